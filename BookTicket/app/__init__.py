@@ -1,24 +1,105 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from urllib.parse import quote
-import cloudinary
-from flask_login import LoginManager
-
-
-app = Flask(__name__)
-
-app.secret_key = 'your_secret_name'
-app.config["SQLALCHEMY_DATABASE_URI"] = "mysql+pymysql://root:%s@your_MySQL_user/flight?charset=utf8mb4" % quote("your_password")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = True
-app.config["NUMBER_ROWS"] = 6
-
-
-db = SQLAlchemy(app)
-
-cloudinary.config(
-    cloud_name='your_cloud_name',
-    api_key='your_api_key',
-    api_secret='your_api_secret'
-)
-
-login = LoginManager(app)
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from urllib.parse import quote
+import cloudinary
+from flask_login import LoginManager
+from flask_migrate import Migrate
+from app.pool import InstrumentedQueuePool
+import os
+
+
+app = Flask(__name__)
+
+app.secret_key = 'your_secret_name'
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL") or \
+    "mysql+pymysql://root:%s@your_MySQL_user/flight?charset=utf8mb4" % quote("your_password")
+# Pool kết nối của mỗi worker, có thể đặt qua biến môi trường
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": InstrumentedQueuePool,  # QueuePool có đo thời gian chờ (xem app/pool.py)
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),  # giây chờ khi pool đã hết kết nối
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),  # giây, nhỏ hơn wait_timeout của MySQL
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+}
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = True
+app.config["NUMBER_ROWS"] = 6
+app.config["BOOKING_MAX_RETRIES"] = 3
+# "dense": tạo sẵn một SeatAssignment cho mỗi ghế của lịch bay, "sparse": chỉ lưu các ghế đã bán
+app.config["SEAT_INVENTORY_MODE"] = "dense"
+# Thư mục chứa bitmap ghế dùng chung giữa các worker (mmap), None = tắt
+app.config["SEAT_BITMAP_DIR"] = None
+# Cache kết quả tìm kiếm chuyến bay trong mỗi worker
+app.config["SEARCH_CACHE_SIZE"] = 1024
+app.config["SEARCH_CACHE_TTL"] = 60
+# Số ngày tối đa trước/sau ngày đi của /api/fare-calendar
+app.config["FARE_CALENDAR_MAX_DAYS"] = 15
+# /api/search: số chuyến bay mặc định và tối đa mỗi trang, số ngày tối đa mỗi lần tìm
+app.config["SEARCH_API_PAGE_SIZE"] = 20
+app.config["SEARCH_API_MAX_PAGE_SIZE"] = 100
+app.config["SEARCH_API_MAX_DAYS"] = 7
+# /api/connections: số chặng tối đa, thời gian nối chuyến tối thiểu (phút, cùng sân bay / đổi sân bay trong cùng tỉnh),
+# thời gian chờ tối đa (phút), số ngày tính từ ngày đi được xét, số hành trình mặc định và tối đa mỗi lần tìm,
+# số hành trình dở dang tối đa được xét, số ngày giữ chỉ mục chặng bay trong bộ nhớ
+app.config["CONNECTION_MAX_LEGS"] = 3
+app.config["CONNECTION_MIN_MINUTES"] = 45
+app.config["CONNECTION_AIRPORT_CHANGE_MINUTES"] = 180
+app.config["CONNECTION_MAX_LAYOVER_MINUTES"] = 720
+app.config["CONNECTION_SEARCH_DAYS"] = 2
+app.config["CONNECTION_PAGE_SIZE"] = 10
+app.config["CONNECTION_MAX_PAGE_SIZE"] = 50
+app.config["CONNECTION_MAX_LABELS"] = 50000
+app.config["CONNECTION_INDEX_DAYS"] = 64
+# Số lịch bay tối đa trong một lần tạo lịch định kỳ
+app.config["RECURRING_SCHEDULE_MAX"] = 500
+# Số ngày tối đa giữa ngày bắt đầu và ngày kết thúc của lịch định kỳ
+app.config["RECURRING_SCHEDULE_MAX_DAYS"] = 366
+# Nhập lịch bay từ file: số dòng mỗi giao dịch, số dòng lỗi hiển thị trên trang admin
+app.config["TIMETABLE_BATCH_SIZE"] = 500
+app.config["TIMETABLE_ERROR_REPORT_LIMIT"] = 100
+# Số giây giữa hai lần đọc lại Policy từ DB (thay đổi từ admin ở worker khác được nhận sau tối đa chừng này)
+app.config["POLICY_REVALIDATE_SECONDS"] = 30
+# Số giây giữa hai lần đọc lại dữ liệu tra cứu (tỉnh, sân bay, mã chuyến bay, máy bay, tuyến bay)
+app.config["REFERENCE_REVALIDATE_SECONDS"] = 300
+# Cache thông tin người dùng đăng nhập cho user_loader
+app.config["USER_CACHE_SIZE"] = 4096
+app.config["USER_CACHE_TTL"] = 30
+# Tải ảnh đại diện ở luồng nền: "cloudinary" hoặc "local" (chép vào static/avatars)
+app.config["AVATAR_STORAGE"] = "cloudinary"
+app.config["AVATAR_SPOOL_DIR"] = None  # None = thư mục tạm của hệ thống
+app.config["AVATAR_UPLOAD_WORKERS"] = 2
+app.config["AVATAR_UPLOAD_RETRIES"] = 5
+app.config["AVATAR_UPLOAD_BACKOFF"] = 1  # giây, nhân đôi sau mỗi lần thử lại
+# Công việc tải ảnh đã được nhận quá số giây này mà chưa xong thì `flask avatar-uploads` chạy lại
+app.config["AVATAR_JOB_STALE_SECONDS"] = 3600
+# Số dòng đọc từ DB mỗi đợt khi xuất dữ liệu
+app.config["EXPORT_YIELD_PER"] = 1000
+# /metrics và /metrics/sql chỉ trả lời khi request gửi "Authorization: Bearer <METRICS_TOKEN>" (None = tắt hẳn).
+# Không dựa vào địa chỉ loopback: sau reverse proxy cùng máy (nginx -> gunicorn) mọi request đều đến từ 127.0.0.1.
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+# Giới hạn thêm theo địa chỉ IP của request (rỗng = không giới hạn), chỉ có ý nghĩa khi không đi qua proxy
+app.config["METRICS_ALLOWED_IPS"] = []
+# Đo truy vấn SQL theo từng request (bật bằng SQL_PROFILER=1), xem /metrics/sql
+app.config["SQL_PROFILER_ENABLED"] = os.environ.get("SQL_PROFILER") == "1"
+app.config["SQL_SLOW_QUERY_MS"] = 200  # ghi log các câu truy vấn chậm hơn ngưỡng này
+app.config["SQL_N_PLUS_ONE_THRESHOLD"] = 5  # số lần lặp một dạng câu lệnh trong một request
+app.config["SQL_PROFILER_TOP"] = 10
+# Giữ ghế từ lúc mở trang đặt vé đến khi thanh toán: thời hạn (giây), số ghế tối đa mỗi phiên,
+# chu kỳ (giây) của luồng dọn các ghế giữ đã hết hạn
+app.config["SEAT_HOLD_TTL"] = 600
+app.config["SEAT_HOLD_MAX_SEATS"] = 10
+app.config["SEAT_HOLD_SWEEP_SECONDS"] = 60
+# Số dòng mỗi lệnh insert khi sinh dữ liệu giả lập (flask seed)
+app.config["SEED_CHUNK_SIZE"] = 5000
+
+
+db = SQLAlchemy(app)
+migrate = Migrate(app, db)
+
+cloudinary.config(
+    cloud_name='your_cloud_name',
+    api_key='your_api_key',
+    api_secret='your_api_secret'
+)
+
+login = LoginManager(app)
@@ -1,59 +1,131 @@
-from flask_sqlalchemy.model import Model
-from app import db, app, dao
-from flask_admin import Admin, BaseView, expose
-from flask_admin.contrib.sqla import ModelView
-from app.models import Flight, FlightRoute, User, UserRole, Policy
-from flask_login import current_user, logout_user
-from flask import redirect
-
-
-class AuthenticatedView(ModelView):
-    def is_accessible(self):
-        return current_user.is_authenticated and current_user.user_role.__eq__(UserRole.ADMIN)
-
-
-class FlightRouteView(AuthenticatedView):
-    can_export = True
-    can_view_details = True
-    # form_columns = ['dep_airport_id', 'des_airport_id']
-    column_list = ['dep_airport', 'des_airport', 'flights']
-    form_columns = ['dep_airport', 'des_airport']
-    form_excluded_columns = ['receipt_details']
-
-
-class FlightView(AuthenticatedView):
-    can_export = True
-    # column_list = ['flight_code', 'flight_route', 'airplane']
-    form_excluded_columns = ['flight_schedules', 'tickets', 'inter_airports']
-
-
-class PolicyView(AuthenticatedView):
-    can_create = False
-
-
-class MyView(BaseView):
-    def is_accessible(self):
-        return current_user.is_authenticated
-
-
-class LogoutView(MyView):
-    @expose("/")
-    def __index__(self):
-        logout_user()
-        return redirect("/")
-
-
-class StatsView(MyView):
-    @expose("/")
-    def __index__(self):
-        return self.render("admin/stats.html", stats=dao.revenue_stats(),
-                           stats_month=dao.revenue_month(), stats_year=dao.revenue_year())
-
-
-admin = Admin(app, name='bookticket', template_mode='bootstrap4')
-
-admin.add_view(FlightRouteView(FlightRoute, db.session))
-admin.add_view(FlightView(Flight, db.session))
-admin.add_view(PolicyView(Policy, db.session))
-admin.add_view(StatsView(name="Report"))
-admin.add_view(LogoutView(name="Log out"))
+from flask_sqlalchemy.model import Model
+from app import db, app, dao, timetable, policy, reference, exports
+from flask_admin import Admin, BaseView, expose
+from flask_admin.contrib.sqla import ModelView
+from app.models import Flight, FlightRoute, User, UserRole, Policy
+from flask_login import current_user, logout_user
+from flask import redirect, request, Response, stream_with_context
+from datetime import datetime, timedelta
+
+
+class AuthenticatedView(ModelView):
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.user_role.__eq__(UserRole.ADMIN)
+
+
+class ReferenceDataView(AuthenticatedView):
+    # Dữ liệu tra cứu (app/reference.py) được dựng lại khi sửa qua trang admin
+    def after_model_change(self, form, model, is_created):
+        reference.invalidate()
+
+    def after_model_delete(self, model):
+        reference.invalidate()
+
+
+class FlightRouteView(ReferenceDataView):
+    can_export = True
+    can_view_details = True
+    # form_columns = ['dep_airport_id', 'des_airport_id']
+    column_list = ['dep_airport', 'des_airport', 'flights']
+    form_columns = ['dep_airport', 'des_airport']
+    form_excluded_columns = ['receipt_details']
+
+
+class FlightView(ReferenceDataView):
+    can_export = True
+    # column_list = ['flight_code', 'flight_route', 'airplane']
+    form_excluded_columns = ['flight_schedules', 'tickets', 'inter_airports']
+
+
+class PolicyView(AuthenticatedView):
+    can_create = False
+
+    def after_model_change(self, form, model, is_created):
+        policy.invalidate()
+
+    def after_model_delete(self, model):
+        policy.invalidate()
+
+
+class MyView(BaseView):
+    def is_accessible(self):
+        return current_user.is_authenticated
+
+
+class LogoutView(MyView):
+    @expose("/")
+    def __index__(self):
+        logout_user()
+        return redirect("/")
+
+
+class StatsView(MyView):
+    @expose("/")
+    def __index__(self):
+        return self.render("admin/stats.html", stats=dao.revenue_stats(),
+                           stats_month=dao.revenue_month(), stats_year=dao.revenue_year())
+
+
+class TimetableImportView(MyView):
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.user_role.__eq__(UserRole.ADMIN)
+
+    @expose("/", methods=['GET', 'POST'])
+    def __index__(self):
+        result, errors = None, []
+        limit = app.config["TIMETABLE_ERROR_REPORT_LIMIT"]
+
+        def on_error(line, message):
+            # Chỉ giữ lại một số dòng lỗi đầu tiên để hiển thị
+            if len(errors) < limit:
+                errors.append((line, message))
+
+        upload = request.files.get('file')
+        if request.method == 'POST' and upload and upload.filename:
+            result = timetable.import_upload(upload, on_error)
+
+        return self.render("admin/timetable.html", result=result, errors=errors, limit=limit,
+                           columns=timetable.COLUMNS)
+
+
+class ExportView(MyView):
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.user_role.__eq__(UserRole.ADMIN)
+
+    @expose("/")
+    def __index__(self):
+        return self.render("admin/export.html", datasets=list(exports.EXPORTS), formats=list(exports.FORMATS),
+                           today=datetime.now().date())
+
+    @expose("/download")
+    def download(self):
+        dataset = request.args.get('dataset')
+        fmt = request.args.get('format', 'csv')
+        if dataset not in exports.EXPORTS or fmt not in exports.FORMATS:
+            return Response("Loại dữ liệu hoặc định dạng không hợp lệ.", status=400)
+
+        # Khoảng ngày [from, to] (mặc định từ đầu năm đến hôm nay)
+        try:
+            today = datetime.now().date()
+            date_from = datetime.strptime(request.args.get('from') or f"{today.year}-01-01", '%Y-%m-%d')
+            date_to = datetime.strptime(request.args.get('to') or today.isoformat(), '%Y-%m-%d')
+        except ValueError:
+            return Response("Ngày không hợp lệ, dùng định dạng YYYY-MM-DD.", status=400)
+
+        filename = f"{dataset}_{date_from:%Y%m%d}_{date_to:%Y%m%d}.{fmt}"
+        return Response(
+            stream_with_context(exports.generate(dataset, date_from, date_to + timedelta(days=1), fmt)),
+            mimetype=exports.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+
+admin = Admin(app, name='bookticket', template_mode='bootstrap4')
+
+admin.add_view(FlightRouteView(FlightRoute, db.session))
+admin.add_view(FlightView(Flight, db.session))
+admin.add_view(PolicyView(Policy, db.session))
+admin.add_view(StatsView(name="Report"))
+admin.add_view(TimetableImportView(name="Timetable"))
+admin.add_view(ExportView(name="Export"))
+admin.add_view(LogoutView(name="Log out"))
@@ -0,0 +1,19 @@
+import click
+from app import app, dao
+
+
+@app.cli.command("seats-reconcile")
+@click.option("--repair", is_flag=True, help="Ghi lại bộ đếm bị lệch.")
+def reconcile_seats_command(repair):
+    """Kiểm tra bộ đếm ghế còn lại của FlightSchedule so với SeatAssignment."""
+    drift = dao.reconcile_remaining_seats(repair=repair)
+    for c in drift:
+        click.echo(f"Lịch bay {c['id']}: lưu {c['stored']}, "
+                   f"thực tế ({c['remaining_business_seats']}, {c['remaining_economy_seats']})")
+    click.echo(f"{len(drift)} lịch bay bị lệch{', đã sửa' if repair and drift else ''}.")
+
+
+@app.cli.command("revenue-rebuild")
+def rebuild_revenue_command():
+    """Tính lại bảng doanh thu gộp revenue_daily từ toàn bộ hóa đơn."""
+    click.echo(f"Đã dựng lại {dao.rebuild_revenue_rollup()} dòng revenue_daily.")
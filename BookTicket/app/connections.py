@@ -0,0 +1,195 @@
+import bisect
+import heapq
+import itertools
+from collections import namedtuple
+from datetime import datetime, timedelta
+from app import app, db, search_cache, seatmap
+from app.cache import TTLCache
+from app.models import FlightSearch, TicketClass
+
+# Một chặng bay trong chỉ mục (một dòng flight_search)
+Leg = namedtuple('Leg', [
+    'flight_schedule_id', 'flight_code', 'dep_province', 'des_province', 'departure_airport', 'destination_airport',
+    'dep_time', 'arrival_time', 'business_price', 'economy_price', 'airline_name',
+    'remaining_business_seats', 'remaining_economy_seats'
+])
+
+# Chỉ mục theo ngày đi: ngày -> DayIndex
+#   departures: tỉnh đi -> (danh sách giờ đi, danh sách chặng) đã sắp theo giờ đi
+#   sources: tỉnh đến -> các tỉnh có chuyến bay thẳng tới (dùng để loại sớm các hướng không tới được nơi đến)
+DayIndex = namedtuple('DayIndex', ['departures', 'sources'])
+
+days = TTLCache(maxsize=app.config.get("CONNECTION_INDEX_DAYS", 64), ttl=app.config.get("SEARCH_CACHE_TTL", 60))
+
+# Khóa xếp hạng hành trình. Mỗi thành phần không giảm khi nối thêm chặng (giá cộng dồn, giờ đến tăng dần,
+# số ghế còn lại chỉ giảm) nên hành trình lấy ra khỏi hàng đợi trước luôn xếp hạng cao hơn
+SORTS = {
+    'price': lambda price, start, arrival, seats: (price, arrival, -seats),
+    'arrival': lambda price, start, arrival, seats: (arrival, price, -seats),
+    'duration': lambda price, start, arrival, seats: (arrival - start, price, -seats),
+}
+
+
+def load_day(day):
+    # Một truy vấn khoảng dep_time trên flight_search cho tất cả các chặng khởi hành trong ngày
+    day_start = datetime(day.year, day.month, day.day)
+    rows = db.session.query(*[getattr(FlightSearch, c) for c in Leg._fields]).filter(
+        FlightSearch.dep_time >= day_start,
+        FlightSearch.dep_time < day_start + timedelta(days=1)
+    ).order_by(FlightSearch.dep_time).all()
+
+    departures, sources = {}, {}
+    for row in rows:
+        leg = Leg(*row)
+        times, legs = departures.setdefault(leg.dep_province, ([], []))
+        times.append(leg.dep_time)
+        legs.append(leg)
+        sources.setdefault(leg.des_province, set()).add(leg.dep_province)
+    return DayIndex(departures, sources)
+
+
+def day_index(day):
+    return days.get_or_set(day, lambda: load_day(day), tags=lambda index: [('day', day)])
+
+
+def _invalidate(departure, destination, departure_date):
+    # Lịch bay hoặc số ghế còn lại của một ngày thay đổi thì chỉ dựng lại chỉ mục ngày đó ở lần tìm sau
+    if departure_date is None:
+        days.clear()
+    else:
+        days.invalidate(('day', departure_date))
+
+
+search_cache.listeners.append(_invalidate)
+
+
+def departures(indexes, province, earliest, latest):
+    # Các chặng khởi hành từ tỉnh trong khoảng [earliest, latest], theo thứ tự giờ đi
+    for index in indexes:
+        times, legs = index.departures.get(province, ((), ()))
+        for i in range(bisect.bisect_left(times, earliest), bisect.bisect_right(times, latest)):
+            yield legs[i]
+
+
+def reachable(indexes, destination, max_legs):
+    # reach[k]: các tỉnh tới được nơi đến trong tối đa k chặng (chỉ xét tuyến, bỏ qua giờ bay)
+    reach = [{destination}]
+    for _ in range(max_legs - 1):
+        frontier = set(reach[-1])
+        for province in reach[-1]:
+            for index in indexes:
+                frontier.update(index.sources.get(province, ()))
+        reach.append(frontier)
+    return reach
+
+
+def connection_minutes(arriving, departing):
+    # Thời gian nối chuyến tối thiểu, lâu hơn nếu phải đổi sân bay trong cùng tỉnh
+    if arriving.destination_airport != departing.departure_airport:
+        return app.config["CONNECTION_AIRPORT_CHANGE_MINUTES"]
+    return app.config["CONNECTION_MIN_MINUTES"]
+
+
+def search(departure, destination, departure_date, seat_class=TicketClass.Economy_Class, passengers=1,
+           max_legs=None, sort='price', limit=None):
+    # Tìm hành trình (bay thẳng hoặc nối chuyến) theo thời gian: tìm theo thứ tự ưu tiên của khóa xếp hạng,
+    # mỗi bước chỉ nối các chặng khởi hành sau thời gian nối chuyến tối thiểu và trước thời gian chờ tối đa.
+    # Giá và số ghế lấy từ chỉ mục trong bộ nhớ, không truy vấn DB cho từng chặng.
+    if sort not in SORTS:
+        raise ValueError(f"Cách sắp xếp không hợp lệ, dùng một trong: {', '.join(SORTS)}.")
+    max_legs = max_legs or app.config["CONNECTION_MAX_LEGS"]
+    if not 1 <= max_legs <= app.config["CONNECTION_MAX_LEGS"]:
+        raise ValueError(f"Số chặng phải từ 1 đến {app.config['CONNECTION_MAX_LEGS']}.")
+    if passengers < 1:
+        raise ValueError("Số hành khách phải lớn hơn 0.")
+    if departure == destination:
+        raise ValueError("Điểm đi và điểm đến phải khác nhau.")
+    limit = min(max(limit or app.config["CONNECTION_PAGE_SIZE"], 1), app.config["CONNECTION_MAX_PAGE_SIZE"])
+
+    indexes = [day_index(departure_date + timedelta(days=i)) for i in range(app.config["CONNECTION_SEARCH_DAYS"])]
+    reach = reachable(indexes, destination, max_legs)
+    max_layover = timedelta(minutes=app.config["CONNECTION_MAX_LAYOVER_MINUTES"])
+    rank = SORTS[sort]
+    business = seat_class == TicketClass.Business_Class
+
+    # Số ghế còn lại lấy từ bitmap dùng chung nếu được bật (mỗi lịch bay đọc một lần)
+    remaining = {}
+
+    def seats(leg):
+        if leg.flight_schedule_id not in remaining:
+            counts = seatmap.remaining_seats(leg.flight_schedule_id) if seatmap.is_enabled() else None
+            if counts:
+                remaining[leg.flight_schedule_id] = counts[seat_class]
+            else:
+                remaining[leg.flight_schedule_id] = leg.remaining_business_seats if business \
+                    else leg.remaining_economy_seats
+        return remaining[leg.flight_schedule_id]
+
+    queue = []
+    order = itertools.count()
+
+    def push(path, price, available):
+        # Chỉ giữ hướng còn tới được nơi đến với số chặng còn lại
+        if path[-1].des_province not in reach[max_legs - len(path)]:
+            return
+        heapq.heappush(queue, (rank(price, path[0].dep_time, path[-1].arrival_time, available), next(order),
+                               path, price, available))
+
+    day_start = datetime(departure_date.year, departure_date.month, departure_date.day)
+    for leg in departures(indexes[:1], departure, day_start, day_start + timedelta(days=1)):
+        if seats(leg) >= passengers:
+            push((leg,), leg.business_price if business else leg.economy_price, seats(leg))
+
+    itineraries = []
+    explored = 0
+    while queue and len(itineraries) < limit and explored < app.config["CONNECTION_MAX_LABELS"]:
+        _, _, path, price, available = heapq.heappop(queue)
+        explored += 1
+        last = path[-1]
+        if last.des_province == destination:
+            itineraries.append(itinerary(path, price, available, passengers, business))
+            continue
+
+        if len(path) == max_legs:
+            continue
+        visited = {leg.dep_province for leg in path} | {last.des_province}
+        earliest = last.arrival_time + timedelta(minutes=min(app.config["CONNECTION_MIN_MINUTES"],
+                                                             app.config["CONNECTION_AIRPORT_CHANGE_MINUTES"]))
+        for leg in departures(indexes, last.des_province, earliest, last.arrival_time + max_layover):
+            if leg.des_province in visited or seats(leg) < passengers:
+                continue
+            if leg.dep_time < last.arrival_time + timedelta(minutes=connection_minutes(last, leg)):
+                continue
+            push(path + (leg,), price + (leg.business_price if business else leg.economy_price),
+                 min(available, seats(leg)))
+
+    return itineraries
+
+
+def itinerary(path, price, available, passengers, business):
+    return {
+        'departure_time': path[0].dep_time.isoformat(timespec='minutes'),
+        'arrival_time': path[-1].arrival_time.isoformat(timespec='minutes'),
+        'duration': int((path[-1].arrival_time - path[0].dep_time).total_seconds() // 60),  # phút
+        'stops': len(path) - 1,
+        'price': price,  # giá mỗi hành khách
+        'total_price': price * passengers,
+        'remaining_seats': available,  # số ghế còn lại ít nhất trong các chặng
+        'legs': [
+            {
+                'flight_schedule_id': leg.flight_schedule_id,
+                'flight_code': leg.flight_code,
+                'departure': leg.dep_province,
+                'destination': leg.des_province,
+                'departure_airport': leg.departure_airport,
+                'destination_airport': leg.destination_airport,
+                'departure_time': leg.dep_time.isoformat(timespec='minutes'),
+                'arrival_time': leg.arrival_time.isoformat(timespec='minutes'),
+                'airline': leg.airline_name.name,
+                'price': leg.business_price if business else leg.economy_price,
+                # Thời gian chờ (phút) trước chặng này
+                'layover': int((leg.dep_time - path[i - 1].arrival_time).total_seconds() // 60) if i else None,
+            }
+            for i, leg in enumerate(path)
+        ],
+    }
@@ -1,367 +1,1044 @@
-import datetime
-
-from app.models import User, Province, Airport, Flight, FlightRoute, FlightSchedule, TicketClass, Seat, SeatAssignment, \
-    Airplane, IntermediateAirport, Receipt, ReceiptDetail, Policy
-from app import app, db
-import hashlib
-import cloudinary.uploader
-import sqlite3, pymysql
-from datetime import timedelta, datetime
-from sqlalchemy.orm import joinedload, aliased
-from sqlalchemy import func, text, and_
-from flask_login import current_user
-from sqlalchemy.sql import extract
-# function connect to database
-from sqlalchemy import func, case, text
-from sqlalchemy.orm import aliased
-
-
-def load_province():
-    return Province.query.order_by('name').all()
-
-
-def load_airport():
-    return Airport.query.order_by('id').all()
-
-
-def load_flight():
-    return Flight.query.order_by('id').all()
-
-
-def load_unique_flights():
-    # Truy vấn tất cả các chuyến bay với flight_code duy nhất
-    flights = db.session.query(Flight.flight_code).distinct(Flight.flight_code).all()
-
-    return flights
-
-
-def get_dep_time(flight_id):
-    return db.session.query(FlightSchedule.dep_time).filter(FlightSchedule.flight_id == flight_id).all()
-
-
-def get_flight(code):
-    return db.session.query(Flight.id).filter(Flight.flight_code == code).all()
-
-
-def load_flight_routes(flight_id):
-    return db.session.query(
-        FlightRoute.dep_airport_id,
-        FlightRoute.des_airport_id,
-    ).join(
-        Flight, FlightRoute.id == Flight.flight_route_id
-    ).filter(
-        Flight.id == flight_id
-    ).all()
-
-
-def get_latest_policy():
-    return Policy.query.order_by(Policy.id.desc()).first()
-
-
-def load_ariplane():
-    return Airplane.query.order_by('id').all()
-
-
-def get_flight_by_id(flight_id):
-    return db.session.query(Flight).options(
-        joinedload(Flight.inter_airports),
-        joinedload(Flight.flight_schedules)
-    ).filter(Flight.id == flight_id).first()
-
-
-def add_user(name, username, password, avatar):
-    password = str(hashlib.md5(password.encode('utf-8')).hexdigest())
-
-    u = User(name=name, username=username, password=password,
-             avatar="https://res.cloudinary.com/dxxwcby8l/image/upload/v1691062682/tkeflqgroeil781yplxt.jpg")
-
-    if avatar:
-        res = cloudinary.uploader.upload(avatar)
-        print(res)
-        u.avatar = res.get("secure_url")
-
-    db.session.add(u)
-    db.session.commit()
-
-
-def auth_user(username, password, role=None):
-    password = str(hashlib.md5(password.encode('utf-8')).hexdigest())
-
-    u = User.query.filter(User.username.__eq__(username),
-                          User.password.__eq__(password))
-
-    if role:
-        u = u.filter(User.user_role.__eq__(role))
-
-    return u.first()
-
-
-def get_user_by_id(id):
-    return User.query.get(id)
-
-
-
-def load_flights(departure, destination, departure_date):
-    # Khai báo các alias cho các bảng
-    departure_airport = aliased(Airport)
-    destination_airport = aliased(Airport)
-    departure_province = aliased(Province)
-    destination_province = aliased(Province)
-
-    # Subquery để lấy thông tin các sân bay trung gian
-    ranked_airports = aliased(
-        db.session.query(
-            IntermediateAirport.flight_id.label('flight_id'),
-            Airport.name.label('airport_name'),
-            IntermediateAirport.stop_time.label('stop_time'),
-            func.row_number().over(
-                partition_by=IntermediateAirport.flight_id,
-                order_by=IntermediateAirport.stop_time
-            ).label('rn')
-        ).join(Airport, IntermediateAirport.airport_id == Airport.id)
-        .filter(IntermediateAirport.stop_time.isnot(None))
-        .subquery()
-    )
-
-    # Truy vấn chính
-    query = db.session.query(
-        Flight.flight_code.label('flight_code'),
-        FlightSchedule.business_class_price.label('business_price'),
-        FlightSchedule.economy_class_price.label('economy_price'),
-        departure_airport.name.label('departure_airport'),
-        destination_airport.name.label('destination_airport'),
-        FlightSchedule.dep_time.label('departure_time'),
-        func.date_add(
-            FlightSchedule.dep_time,
-            text("INTERVAL flight_schedule.flight_time MINUTE")
-        ).label('arrival_time'),
-        FlightSchedule.flight_time.label('flight_time'),
-        Airplane.name.label('airplane_name'),
-        Airplane.airplane_type.label('airline_name'),
-        db.session.query(func.count())
-        .filter(
-            SeatAssignment.flight_schedule_id == FlightSchedule.id,
-            SeatAssignment.is_available == True,
-            Seat.seat_class == TicketClass.Business_Class,
-            SeatAssignment.seat_id == Seat.id
-        ).scalar_subquery().label('remaining_business_seats'),
-        db.session.query(func.count())
-        .filter(
-            SeatAssignment.flight_schedule_id == FlightSchedule.id,
-            SeatAssignment.is_available == True,
-            Seat.seat_class == TicketClass.Economy_Class,
-            SeatAssignment.seat_id == Seat.id
-        ).scalar_subquery().label('remaining_economy_seats'),
-        Flight.id.label('flight_id'),
-        FlightSchedule.id.label('flight_schedule_id'),  # Thêm flight_schedule_id
-        # Intermediate airports
-        func.max(
-            case(
-                (ranked_airports.c.rn == 1, ranked_airports.c.airport_name)
-            )
-        ).label('intermediate_airport_1'),
-        func.max(
-            case(
-                (ranked_airports.c.rn == 1, ranked_airports.c.stop_time)
-            )
-        ).label('ia_stop_time_1'),
-        func.max(
-            case(
-                (ranked_airports.c.rn == 2, ranked_airports.c.airport_name)
-            )
-        ).label('intermediate_airport_2'),
-        func.max(
-            case(
-                (ranked_airports.c.rn == 2, ranked_airports.c.stop_time)
-            )
-        ).label('ia_stop_time_2')
-    ).join(
-        FlightSchedule, Flight.id == FlightSchedule.flight_id
-    ).join(
-        FlightRoute, Flight.flight_route_id == FlightRoute.id
-    ).join(
-        departure_airport, FlightRoute.dep_airport_id == departure_airport.id
-    ).join(
-        destination_airport, FlightRoute.des_airport_id == destination_airport.id
-    ).join(
-        Airplane, Flight.airplane_id == Airplane.id
-    ).join(
-        departure_province, departure_airport.province_id == departure_province.id
-    ).join(
-        destination_province, destination_airport.province_id == destination_province.id
-    ).outerjoin(
-        ranked_airports, ranked_airports.c.flight_id == Flight.id
-    ).filter(
-        departure_province.name == departure,
-        destination_province.name == destination,
-        func.date(FlightSchedule.dep_time) == departure_date
-    ).group_by(
-        Flight.flight_code,
-        FlightSchedule.business_class_price,
-        FlightSchedule.economy_class_price,
-        departure_airport.name,
-        destination_airport.name,
-        FlightSchedule.dep_time,
-        FlightSchedule.flight_time,
-        Airplane.name,
-        Airplane.airplane_type,
-        Flight.id,
-        FlightSchedule.id
-    )
-
-    # Thực thi truy vấn
-    results = query.all()
-
-    # Chuyển đổi kết quả thành danh sách dictionary
-    flights = [
-        {
-            "flight_code": row[0],  # Mã chuyến bay
-            "business_price": row[1],  # Giá vé hạng 1
-            "economy_price": row[2],  # Giá vé hạng 2
-            "departure_airport": row[3],  # Sân bay đi
-            "destination_airport": row[4],  # Sân bay đến
-            "departure_time": row[5],  # Giờ khởi hành
-            "arrival_time": row[6],  # Giờ đến
-            "flight_time": format_flight_time(row[7]),  # Thời gian bay
-            "airplane_name": row[8],  # Tên máy bay
-            "airline_name": row[9],  # Tên hãng hàng không
-            "remaining_business_seats": row[10],  # Số ghế hạng 1 còn lại
-            "remaining_economy_seats": row[11],  # Số ghế hạng 2 còn lại
-            "flight_id": row[12],  # ID chuyến bay
-            "flight_schedule_id": row[13],  # ID lịch bay
-            "intermediate_airport_1": row[14],  # Sân bay trung gian 1
-            "ia_stop_time_1": row[15],  # Thời gian dừng tại sân bay trung gian 1
-            "intermediate_airport_2": row[16],  # Sân bay trung gian 2
-            "ia_stop_time_2": row[17],  # Thời gian dừng tại sân bay trung gian 2
-        }
-        for row in results
-    ]
-
-    return flights
-
-
-
-def get_available_seats_by_row(flight_id, seat_class):
-    # Lấy tất cả các ghế trống theo flight_id và seat_class
-    available_seats = db.session.query(Seat).join(SeatAssignment).join(FlightSchedule) \
-        .filter(
-            FlightSchedule.flight_id == flight_id,
-            SeatAssignment.is_available == True,
-            Seat.seat_class == seat_class
-        ).options(joinedload(Seat.seat_assignments)).all()
-
-    # Nhóm ghế theo hàng
-    rows = {}
-    for seat in available_seats:
-        # Tách số hàng và chữ ghế (ví dụ E1A => row=1, seat_code='A')
-        row_number = int(seat.seat_code[1:-1])  # lấy phần số của mã ghế (E1A => 1)
-        seat_code = seat.seat_code[-1]  # lấy phần chữ của mã ghế (E1A => A)
-
-        if row_number not in rows:
-            rows[row_number] = []
-
-        rows[row_number].append(seat_code)
-
-    return rows
-
-
-def get_available_seats(flight_id, seat_class):
-    return db.session.query(Seat).join(SeatAssignment).join(FlightSchedule) \
-        .filter(
-        FlightSchedule.flight_id == flight_id,
-        SeatAssignment.is_available == True,
-        Seat.seat_class == seat_class
-    ).options(joinedload(Seat.seat_assignments)).all()
-
-
-def format_flight_time(flight_time):
-    if flight_time < 60:
-        return f"{flight_time} phút"
-    else:
-        hours = flight_time // 60
-        minutes = flight_time % 60
-        return f"{hours} giờ {str(minutes).zfill(2)} phút"
-
-
-def get_max_seat(flight_id):
-    return db.session.query(
-        Airplane.business_class_seat_size,
-        Airplane.economy_class_seat_size
-    ).join(
-        Flight, Flight.airplane_id == Airplane.id
-    ).filter(
-        Flight.id == flight_id
-    ).first()
-
-
-def find_flight_route(dep_id, des_id):
-    return FlightRoute.query.filter_by(
-        dep_airport_id=dep_id,
-        des_airport_id=des_id
-    ).first()
-
-
-def get_flight_by_code_and_airports(flight_code, dep_airport_id, des_airport_id):
-    return db.session.query(Flight.id).join(
-        FlightRoute, FlightRoute.id == Flight.flight_route_id
-    ).filter(
-        Flight.flight_code.__eq__(flight_code),
-        FlightRoute.dep_airport_id == dep_airport_id,
-        FlightRoute.des_airport_id == des_airport_id
-    ).first()
-
-
-def revenue_stats():
-    # Alias cho bảng Airport và Province
-    dep_airport = aliased(Airport)  # Sân bay đi
-    des_airport = aliased(Airport)  # Sân bay đến
-    dep_province = aliased(Province)  # Tỉnh nơi đi
-    des_province = aliased(Province)  # Tỉnh nơi đến
-
-    return (db.session.query(
-                FlightRoute.id.label('flight_route_id'),
-                func.sum(ReceiptDetail.quantity * ReceiptDetail.unit_price),
-                dep_province.name,
-                des_province.name
-            )
-            .join(ReceiptDetail, ReceiptDetail.flight_route_id == FlightRoute.id)
-            .join(dep_airport, dep_airport.id == FlightRoute.dep_airport_id)
-            .join(dep_province, dep_province.id == dep_airport.province_id)
-            .join(des_airport, des_airport.id == FlightRoute.des_airport_id)
-            .join(des_province, des_province.id == des_airport.province_id)
-            .group_by(
-                FlightRoute.id,  # Nhóm theo ID tuyến bay
-                dep_province.name,  # Nhóm theo tên tỉnh nơi đi
-                des_province.name  # Nhóm theo tên tỉnh nơi đến
-            )
-            .all())
-
-
-def revenue_month(time='month', year=datetime.now().year):
-    return db.session.query(
-                func.extract(time, Receipt.created_date),
-                func.sum(ReceiptDetail.quantity * ReceiptDetail.unit_price)
-            )\
-            .join(ReceiptDetail, ReceiptDetail.receipt_id == Receipt.id) \
-            .filter(func.extract("year", Receipt.created_date) == year) \
-            .group_by(func.extract(time, Receipt.created_date)) \
-            .order_by(func.extract(time, Receipt.created_date)) \
-            .all()
-
-
-def revenue_year(time='year'):
-    return db.session.query(
-        func.extract(time, Receipt.created_date),
-        func.sum(ReceiptDetail.quantity * ReceiptDetail.unit_price)
-    ).join(
-        ReceiptDetail, ReceiptDetail.receipt_id == Receipt.id
-    ).group_by(
-        func.extract(time, Receipt.created_date)
-    ).order_by(
-        func.extract(time, Receipt.created_date)
-    ).all()
-
-
-if __name__ == '__main__':
-    with app.app_context():
+import datetime
+
+from app.models import User, Province, Airport, Flight, FlightRoute, FlightSchedule, TicketClass, Seat, SeatAssignment, \
+    Airplane, Receipt, ReceiptDetail, Policy, Customer, Ticket, FlightSearch, RevenueDaily
+from app import app, db, seatmap, search_cache, read_model, policy, uploads, holds
+import base64
+import hashlib
+import json
+import time
+import sqlite3, pymysql
+from datetime import timedelta, datetime
+from sqlalchemy.orm import joinedload, aliased
+from sqlalchemy import func, and_, update, insert, select, delete, or_, true, tuple_
+from sqlalchemy.exc import OperationalError, IntegrityError
+from flask_login import current_user
+from sqlalchemy.sql import extract
+# function connect to database
+from sqlalchemy import func, case
+from sqlalchemy.orm import aliased
+
+
+def load_province():
+    return Province.query.order_by('name').all()
+
+
+def load_airport():
+    return Airport.query.order_by('id').all()
+
+
+def load_flight():
+    return Flight.query.order_by('id').all()
+
+
+def load_unique_flights():
+    # Truy vấn tất cả các chuyến bay với flight_code duy nhất
+    flights = db.session.query(Flight.flight_code).distinct(Flight.flight_code).all()
+
+    return flights
+
+
+def get_dep_time(flight_id):
+    return db.session.query(FlightSchedule.dep_time).filter(FlightSchedule.flight_id == flight_id).all()
+
+
+def get_flight(code):
+    return db.session.query(Flight.id).filter(Flight.flight_code == code).all()
+
+
+def load_flight_routes(flight_id):
+    return db.session.query(
+        FlightRoute.dep_airport_id,
+        FlightRoute.des_airport_id,
+    ).join(
+        Flight, FlightRoute.id == Flight.flight_route_id
+    ).filter(
+        Flight.id == flight_id
+    ).all()
+
+
+def load_routes_by_codes(codes):
+    # Sân bay đi/đến của mọi chuyến bay thuộc các mã chuyến bay, trong một truy vấn: {mã: [...]}
+    dep_airport = aliased(Airport)
+    des_airport = aliased(Airport)
+
+    rows = db.session.query(
+        Flight.flight_code, Flight.id, dep_airport.id, dep_airport.name, des_airport.id, des_airport.name
+    ).join(
+        FlightRoute, FlightRoute.id == Flight.flight_route_id
+    ).join(
+        dep_airport, dep_airport.id == FlightRoute.dep_airport_id
+    ).join(
+        des_airport, des_airport.id == FlightRoute.des_airport_id
+    ).filter(
+        Flight.flight_code.in_(codes)
+    ).order_by(Flight.id).all()
+
+    routes = {}
+    for code, flight_id, dep_id, dep_name, des_id, des_name in rows:
+        routes.setdefault(code, []).append({
+            'flight_id': flight_id,
+            'dep_airport': {'id': dep_id, 'name': dep_name},
+            'des_airport': {'id': des_id, 'name': des_name}
+        })
+
+    return routes
+
+
+def get_latest_policy():
+    return policy.current()
+
+
+def load_ariplane():
+    return Airplane.query.order_by('id').all()
+
+
+def get_flight_by_id(flight_id):
+    return db.session.query(Flight).options(
+        joinedload(Flight.inter_airports),
+        joinedload(Flight.flight_schedules)
+    ).filter(Flight.id == flight_id).first()
+
+
+def add_user(name, username, password, avatar):
+    password = str(hashlib.md5(password.encode('utf-8')).hexdigest())
+
+    u = User(name=name, username=username, password=password,
+             avatar="https://res.cloudinary.com/dxxwcby8l/image/upload/v1691062682/tkeflqgroeil781yplxt.jpg")
+
+    db.session.add(u)
+    db.session.commit()
+
+    # Lưu người dùng với ảnh mặc định ngay, ảnh đại diện được tải lên ở luồng nền (app/uploads.py)
+    # Ảnh không hợp lệ hoặc không ghi được xuống spool: tài khoản đã tạo, giữ ảnh mặc định
+    if avatar:
+        try:
+            uploads.submit(u.id, avatar)
+        except (ValueError, OSError) as ex:
+            app.logger.warning("Không nhận ảnh đại diện của user %s: %s", u.id, ex)
+
+
+def auth_user(username, password, role=None):
+    password = str(hashlib.md5(password.encode('utf-8')).hexdigest())
+
+    u = User.query.filter(User.username.__eq__(username),
+                          User.password.__eq__(password))
+
+    if role:
+        u = u.filter(User.user_role.__eq__(role))
+
+    return u.first()
+
+
+def get_user_by_id(id):
+    return User.query.get(id)
+
+
+
+def load_flights(departure, destination, departure_date):
+    # Kết quả tìm kiếm được cache theo (nơi đi, nơi đến, ngày đi)
+    key = search_cache.make_key(departure, destination, departure_date)
+    flights = search_cache.flights.get_or_set(
+        key, lambda: query_flights(*key), tags=lambda results: search_cache.tags_for(key, results)
+    )
+
+    # Số ghế còn lại lấy từ bitmap dùng chung nếu được bật
+    if seatmap.is_enabled():
+        flights = [dict(f) for f in flights]
+        for f in flights:
+            remaining = seatmap.remaining_seats(f['flight_schedule_id'])
+            if remaining:
+                f['remaining_business_seats'] = remaining[TicketClass.Business_Class]
+                f['remaining_economy_seats'] = remaining[TicketClass.Economy_Class]
+
+    return flights
+
+
+def day_range(day, days=1):
+    # Khoảng [bắt đầu, kết thúc) để lọc theo ngày mà vẫn dùng được index trên cột datetime
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=days)
+
+
+def query_flights(departure, destination, departure_date):
+    # Đọc từ bảng flight_search (một dòng cho mỗi lịch bay, đã có sẵn sân bay trung gian và số ghế còn lại)
+    day_start, day_end = day_range(departure_date)
+    results = FlightSearch.query.filter(
+        FlightSearch.dep_province == departure,
+        FlightSearch.des_province == destination,
+        FlightSearch.dep_time >= day_start,
+        FlightSearch.dep_time < day_end
+    ).order_by(FlightSearch.dep_time).all()
+
+    # Chuyển đổi kết quả thành danh sách dictionary
+    flights = [
+        {
+            "flight_code": f.flight_code,  # Mã chuyến bay
+            "business_price": f.business_price,  # Giá vé hạng 1
+            "economy_price": f.economy_price,  # Giá vé hạng 2
+            "departure_airport": f.departure_airport,  # Sân bay đi
+            "destination_airport": f.destination_airport,  # Sân bay đến
+            "departure_time": f.dep_time,  # Giờ khởi hành
+            "arrival_time": f.arrival_time,  # Giờ đến
+            "flight_time": format_flight_time(f.flight_time),  # Thời gian bay
+            "airplane_name": f.airplane_name,  # Tên máy bay
+            "airline_name": f.airline_name,  # Tên hãng hàng không
+            "remaining_business_seats": f.remaining_business_seats,  # Số ghế hạng 1 còn lại
+            "remaining_economy_seats": f.remaining_economy_seats,  # Số ghế hạng 2 còn lại
+            "flight_id": f.flight_id,  # ID chuyến bay
+            "flight_schedule_id": f.flight_schedule_id,  # ID lịch bay
+            "intermediate_airport_1": f.intermediate_airport_1,  # Sân bay trung gian 1
+            "ia_stop_time_1": f.ia_stop_time_1,  # Thời gian dừng tại sân bay trung gian 1
+            "intermediate_airport_2": f.intermediate_airport_2,  # Sân bay trung gian 2
+            "ia_stop_time_2": f.ia_stop_time_2,  # Thời gian dừng tại sân bay trung gian 2
+        }
+        for f in results
+    ]
+
+    return flights
+
+
+# Các trường của /api/search và cột tương ứng trong flight_search
+SEARCH_FIELDS = {
+    'flight_schedule_id': [FlightSearch.flight_schedule_id],
+    'flight_id': [FlightSearch.flight_id],
+    'flight_code': [FlightSearch.flight_code],
+    'departure_airport': [FlightSearch.departure_airport],
+    'destination_airport': [FlightSearch.destination_airport],
+    'departure_time': [FlightSearch.dep_time],
+    'arrival_time': [FlightSearch.arrival_time],
+    'flight_time': [FlightSearch.flight_time],
+    'business_price': [FlightSearch.business_price],
+    'economy_price': [FlightSearch.economy_price],
+    'airplane_name': [FlightSearch.airplane_name],
+    'airline': [FlightSearch.airline_name],
+    'remaining_business_seats': [FlightSearch.remaining_business_seats],
+    'remaining_economy_seats': [FlightSearch.remaining_economy_seats],
+    'stops': [FlightSearch.intermediate_airport_1, FlightSearch.ia_stop_time_1,
+              FlightSearch.intermediate_airport_2, FlightSearch.ia_stop_time_2],
+}
+
+# Cách sắp xếp: các cột của khóa phân trang, luôn kết thúc bằng (dep_time, flight_schedule_id) để thứ tự là duy nhất
+SEARCH_SORTS = {
+    'departure': [FlightSearch.dep_time, FlightSearch.flight_schedule_id],
+    'price': [FlightSearch.economy_price, FlightSearch.dep_time, FlightSearch.flight_schedule_id],
+    'business_price': [FlightSearch.business_price, FlightSearch.dep_time, FlightSearch.flight_schedule_id],
+}
+
+
+def encode_cursor(sort, values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps([sort] + values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        columns = SEARCH_SORTS[sort]
+        if data[0] != sort or len(data) != len(columns) + 1:
+            raise ValueError
+        return [datetime.fromisoformat(v) if c is FlightSearch.dep_time else int(v)
+                for c, v in zip(columns, data[1:])]
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise ValueError("Cursor không hợp lệ.")
+
+
+def keyset_after(columns, values):
+    # (c1, c2, ...) > (v1, v2, ...) viết dạng OR/AND để dùng được index trên mọi hệ CSDL
+    conditions = []
+    for i, column in enumerate(columns):
+        conditions.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], column > values[i]))
+    return or_(*conditions)
+
+
+def search_flights_page(departure, destination, departure_date, days=1, sort='departure', airlines=None,
+                        max_stops=None, fields=None, limit=None, cursor=None):
+    # Một trang kết quả tìm kiếm cho /api/search: một truy vấn LIMIT (limit + 1 để biết còn trang sau),
+    # chỉ chọn các cột của những trường được yêu cầu. Trả về (danh sách chuyến bay, cursor trang sau)
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"Cách sắp xếp không hợp lệ, dùng một trong: {', '.join(SEARCH_SORTS)}.")
+    fields = fields or list(SEARCH_FIELDS)
+    unknown = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Trường không hợp lệ: {', '.join(unknown)}.")
+    if not 1 <= days <= app.config["SEARCH_API_MAX_DAYS"]:
+        raise ValueError(f"Chỉ tìm được tối đa {app.config['SEARCH_API_MAX_DAYS']} ngày.")
+    # Mỗi chuyến bay có tối đa 2 sân bay trung gian (intermediate_airport_1, intermediate_airport_2)
+    if max_stops is not None and not 0 <= max_stops <= 2:
+        raise ValueError("max_stops phải từ 0 đến 2.")
+    limit = min(max(limit or app.config["SEARCH_API_PAGE_SIZE"], 1), app.config["SEARCH_API_MAX_PAGE_SIZE"])
+
+    sort_columns = SEARCH_SORTS[sort]
+    columns = list(dict.fromkeys(sort_columns + [c for f in fields for c in SEARCH_FIELDS[f]]))
+    day_start, day_end = day_range(departure_date, days)
+    query = db.session.query(*columns).filter(
+        FlightSearch.dep_province == departure,
+        FlightSearch.des_province == destination,
+        FlightSearch.dep_time >= day_start,
+        FlightSearch.dep_time < day_end
+    )
+    if airlines:
+        query = query.filter(FlightSearch.airline_name.in_(airlines))
+    if max_stops is not None:
+        # Sân bay trung gian được điền lần lượt vào cột 1 rồi cột 2
+        if max_stops == 0:
+            query = query.filter(FlightSearch.intermediate_airport_1.is_(None))
+        elif max_stops == 1:
+            query = query.filter(FlightSearch.intermediate_airport_2.is_(None))
+    if cursor:
+        query = query.filter(keyset_after(sort_columns, decode_cursor(cursor, sort)))
+    rows = query.order_by(*sort_columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, [getattr(rows[-1], c.key) for c in sort_columns])
+
+    flights = []
+    for r in rows:
+        flight = {}
+        for f in fields:
+            if f == 'stops':
+                flight[f] = [{'airport': airport, 'stop_time': stop_time}
+                             for airport, stop_time in ((r.intermediate_airport_1, r.ia_stop_time_1),
+                                                        (r.intermediate_airport_2, r.ia_stop_time_2)) if airport]
+            elif f == 'airline':
+                flight[f] = r.airline_name.name
+            elif f in ('departure_time', 'arrival_time'):
+                flight[f] = getattr(r, SEARCH_FIELDS[f][0].key).isoformat(timespec='minutes')
+            else:
+                flight[f] = getattr(r, SEARCH_FIELDS[f][0].key)
+        flights.append(flight)
+
+    return flights, next_cursor
+
+
+def load_fare_calendar(departure, destination, start_date, days):
+    departure, destination, start_date = search_cache.make_key(departure, destination, start_date)
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    return search_cache.calendars.get_or_set(
+        (departure, destination, start_date, days),
+        lambda: query_fare_calendar(departure, destination, dates),
+        tags=lambda result: search_cache.calendar_tags(departure, destination, dates)
+    )
+
+
+def query_fare_calendar(departure, destination, dates):
+    # Một truy vấn GROUP BY theo ngày cho cả khoảng ngày thay vì tìm kiếm từng ngày
+    window_start, window_end = day_range(dates[0], len(dates))
+    dep_date = func.date(FlightSearch.dep_time)
+    rows = db.session.query(
+        dep_date,
+        # Giá rẻ nhất chỉ tính các lịch bay còn ghế ở hạng đó
+        func.min(case((FlightSearch.remaining_business_seats > 0, FlightSearch.business_price))),
+        func.min(case((FlightSearch.remaining_economy_seats > 0, FlightSearch.economy_price))),
+        func.sum(FlightSearch.remaining_business_seats),
+        func.sum(FlightSearch.remaining_economy_seats),
+        func.count(FlightSearch.flight_schedule_id)
+    ).filter(
+        FlightSearch.dep_province == departure,
+        FlightSearch.des_province == destination,
+        FlightSearch.dep_time >= window_start,
+        FlightSearch.dep_time < window_end
+    ).group_by(dep_date).all()
+
+    by_date = {str(row[0]): row for row in rows}
+    calendar = []
+    for d in dates:
+        row = by_date.get(d.isoformat())
+        calendar.append({
+            "date": d.isoformat(),
+            "business_price": row[1] if row else None,  # Giá vé hạng 1 rẻ nhất
+            "economy_price": row[2] if row else None,  # Giá vé hạng 2 rẻ nhất
+            "remaining_business_seats": int(row[3]) if row else 0,
+            "remaining_economy_seats": int(row[4]) if row else 0,
+            "flights": row[5] if row else 0,
+        })
+
+    return calendar
+
+
+def get_available_seats_by_row(flight_schedule_id, seat_class):
+    # Lấy tất cả các ghế trống theo flight_schedule_id và seat_class
+    available_seats = get_available_seats(flight_schedule_id, seat_class)
+
+    # Nhóm ghế theo hàng
+    rows = {}
+    for seat in available_seats:
+        # Tách số hàng và chữ ghế (ví dụ E1A => row=1, seat_code='A')
+        row_number = int(seat.seat_code[1:-1])  # lấy phần số của mã ghế (E1A => 1)
+        seat_code = seat.seat_code[-1]  # lấy phần chữ của mã ghế (E1A => A)
+
+        if row_number not in rows:
+            rows[row_number] = []
+
+        rows[row_number].append(seat_code)
+
+    return rows
+
+
+def is_sparse_inventory():
+    # Chế độ "sparse": chỉ lưu SeatAssignment cho các ghế đã bán
+    return app.config.get("SEAT_INVENTORY_MODE") == "sparse"
+
+
+def seat_allotment(airplane_id, seat_class, size):
+    # Các ghế được mở bán cho một lịch bay: `size` ghế đầu tiên của hạng đó (giống create_seat_assignments)
+    return db.session.query(Seat.id.label('id')).filter(
+        Seat.airplane_id == airplane_id,
+        Seat.seat_class == seat_class
+    ).order_by(Seat.id).limit(size).subquery()
+
+
+def get_schedule_inventory(flight_schedule_id):
+    return db.session.query(
+        FlightSchedule.id,
+        FlightSchedule.business_class_seat_size,
+        FlightSchedule.economy_class_seat_size,
+        FlightSchedule.dep_time,
+        Flight.flight_route_id,
+        Flight.airplane_id
+    ).join(
+        Flight, Flight.id == FlightSchedule.flight_id
+    ).filter(FlightSchedule.id == flight_schedule_id).first()
+
+
+def allotment_size(schedule, seat_class):
+    if seat_class == TicketClass.Business_Class:
+        return schedule.business_class_seat_size
+    return schedule.economy_class_seat_size
+
+
+def get_available_seats(flight_schedule_id, seat_class, hold_key=None):
+    # Ghế chưa bán và không bị phiên khác giữ (ghế do chính phiên hold_key giữ vẫn được tính là trống)
+    seats = get_unsold_seats(flight_schedule_id, seat_class)
+    held = holds.held_seat_ids(flight_schedule_id, exclude_key=hold_key)
+    return [s for s in seats if s.id not in held] if held else seats
+
+
+def hold_seats(flight_schedule_id, seat_class, seat_codes, hold_key):
+    # Giữ các ghế đã chọn cho phiên hold_key, thay cho các ghế phiên này đang giữ trên lịch bay.
+    # Trả về thời điểm hết hạn
+    seat_codes = list(dict.fromkeys(c for c in seat_codes if c))
+    if len(seat_codes) > app.config["SEAT_HOLD_MAX_SEATS"]:
+        raise ValueError(f"Chỉ được giữ tối đa {app.config['SEAT_HOLD_MAX_SEATS']} ghế.")
+
+    available = {s.seat_code: s.id for s in get_available_seats(flight_schedule_id, seat_class, hold_key)}
+    missing = [code for code in seat_codes if code not in available]
+    if missing:
+        raise ValueError(f"Ghế không khả dụng: {', '.join(missing)}.")
+
+    try:
+        expires_at = holds.place(flight_schedule_id, [available[code] for code in seat_codes], hold_key)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise ValueError("Ghế vừa được khách hàng khác giữ, vui lòng chọn ghế khác.")
+    except OperationalError as ex:
+        db.session.rollback()
+        # MySQL: hai phiên cùng giữ một ghế đều khóa khoảng trống (gap lock) khi DELETE ghế chưa có dòng giữ,
+        # rồi chặn INSERT của nhau -> deadlock. Coi như ghế vừa bị giữ để bên gọi thử lại với danh sách mới
+        if not is_deadlock(ex):
+            raise
+        raise ValueError("Ghế vừa được khách hàng khác giữ, vui lòng chọn ghế khác.")
+    return expires_at
+
+
+def hold_first_available(flight_schedule_id, seat_class, count, hold_key, attempts=3):
+    # Giữ trước `count` ghế trống đầu tiên, ưu tiên các ghế phiên này đang giữ (khi tải lại trang).
+    # Nhiều người mở trang cùng lúc sẽ tranh nhau cùng các ghế đầu: thử lại với danh sách mới.
+    # Trả về (ghế trống, mã các ghế đã giữ, thời điểm hết hạn)
+    for attempt in range(attempts):
+        available = get_available_seats(flight_schedule_id, seat_class, hold_key)
+        own = holds.own_seat_ids(flight_schedule_id, hold_key)
+        candidates = [s.seat_code for s in sorted(available, key=lambda s: s.id not in own)[:count]]
+        if len(candidates) < count:
+            return available, [], None
+        try:
+            return available, candidates, hold_seats(flight_schedule_id, seat_class, candidates, hold_key)
+        except ValueError:
+            continue
+    return get_available_seats(flight_schedule_id, seat_class, hold_key), [], None
+
+
+def get_unsold_seats(flight_schedule_id, seat_class):
+    # Đọc từ bitmap dùng chung giữa các worker nếu được bật, không cần truy vấn DB
+    if seatmap.is_enabled():
+        seats = seatmap.available_seats(flight_schedule_id, seat_class)
+        if seats is not None:
+            return seats
+
+    if not is_sparse_inventory():
+        return db.session.query(Seat).join(SeatAssignment).filter(
+            SeatAssignment.flight_schedule_id == flight_schedule_id,
+            SeatAssignment.is_available == True,
+            Seat.seat_class == seat_class
+        ).order_by(Seat.id).all()
+
+    schedule = get_schedule_inventory(flight_schedule_id)
+    if not schedule:
+        return []
+
+    # Ghế trống = sơ đồ ghế của máy bay trừ đi các ghế đã bán
+    allotted = seat_allotment(schedule.airplane_id, seat_class, allotment_size(schedule, seat_class))
+    return db.session.query(Seat).join(allotted, allotted.c.id == Seat.id).filter(
+        ~db.session.query(SeatAssignment.id).filter(
+            SeatAssignment.seat_id == Seat.id,
+            SeatAssignment.flight_schedule_id == flight_schedule_id,
+            SeatAssignment.is_available == False
+        ).exists()
+    ).order_by(Seat.id).all()
+
+
+def format_flight_time(flight_time):
+    if flight_time < 60:
+        return f"{flight_time} phút"
+    else:
+        hours = flight_time // 60
+        minutes = flight_time % 60
+        return f"{hours} giờ {str(minutes).zfill(2)} phút"
+
+
+def get_max_seat(flight_id):
+    return db.session.query(
+        Airplane.business_class_seat_size,
+        Airplane.economy_class_seat_size
+    ).join(
+        Flight, Flight.airplane_id == Airplane.id
+    ).filter(
+        Flight.id == flight_id
+    ).first()
+
+
+def find_flight_route(dep_id, des_id):
+    return FlightRoute.query.filter_by(
+        dep_airport_id=dep_id,
+        des_airport_id=des_id
+    ).first()
+
+
+def get_flight_by_code_and_airports(flight_code, dep_airport_id, des_airport_id):
+    return db.session.query(Flight.id).join(
+        FlightRoute, FlightRoute.id == Flight.flight_route_id
+    ).filter(
+        Flight.flight_code.__eq__(flight_code),
+        FlightRoute.dep_airport_id == dep_airport_id,
+        FlightRoute.des_airport_id == des_airport_id
+    ).first()
+
+
+def recurring_dep_times(start_date, end_date, dep_clock, weekdays=None):
+    # Các thời điểm khởi hành từ start_date đến end_date (kể cả), weekdays: 0 = Thứ hai ... 6 = Chủ nhật
+    if end_date < start_date:
+        raise ValueError("Ngày kết thúc phải sau hoặc bằng ngày bắt đầu.")
+    if (end_date - start_date).days + 1 > app.config["RECURRING_SCHEDULE_MAX_DAYS"]:
+        raise ValueError(f"Khoảng ngày tối đa là {app.config['RECURRING_SCHEDULE_MAX_DAYS']} ngày.")
+
+    dep_times = []
+    day = start_date
+    while day <= end_date:
+        if weekdays is None or day.weekday() in weekdays:
+            dep_times.append(datetime.combine(day, dep_clock))
+        day += timedelta(days=1)
+    return dep_times
+
+
+def create_seat_inventory(connection, flight_schedule_ids):
+    # Tạo SeatAssignment cho nhiều lịch bay bằng một câu INSERT ... SELECT:
+    # mỗi lịch bay lấy N ghế đầu tiên (theo id) của mỗi hạng trên máy bay của chuyến bay
+    ranked_seats = select(
+        Seat.id.label('seat_id'),
+        Seat.airplane_id.label('airplane_id'),
+        Seat.seat_class.label('seat_class'),
+        func.row_number().over(partition_by=(Seat.airplane_id, Seat.seat_class), order_by=Seat.id).label('rn')
+    ).subquery()
+
+    allotment = select(
+        ranked_seats.c.seat_id, FlightSchedule.id, true()
+    ).join(
+        Flight, Flight.id == FlightSchedule.flight_id
+    ).join(
+        ranked_seats, ranked_seats.c.airplane_id == Flight.airplane_id
+    ).where(
+        FlightSchedule.id.in_(flight_schedule_ids),
+        or_(
+            and_(ranked_seats.c.seat_class == TicketClass.Business_Class,
+                 ranked_seats.c.rn <= FlightSchedule.business_class_seat_size),
+            and_(ranked_seats.c.seat_class == TicketClass.Economy_Class,
+                 ranked_seats.c.rn <= FlightSchedule.economy_class_seat_size)
+        )
+    )
+
+    connection.execute(insert(SeatAssignment).from_select(
+        ['seat_id', 'flight_schedule_id', 'is_available'], allotment
+    ))
+
+
+def seat_counts(airplane_id):
+    # Số ghế thực có trên máy bay theo từng hạng
+    return dict(db.session.query(Seat.seat_class, func.count(Seat.id)).filter(
+        Seat.airplane_id == airplane_id
+    ).group_by(Seat.seat_class).all())
+
+
+def bulk_create_schedules(connection, rows, refresh_flight_ids=()):
+    # Insert nhiều lịch bay (rows: dict theo cột FlightSchedule, đã có bộ đếm ghế) cùng ghế của chúng.
+    # Không commit. Trả về (id các lịch bay mới, các tuyến (tỉnh đi, tỉnh đến) cần hủy cache)
+    connection.execute(insert(FlightSchedule), rows)
+
+    schedule_ids = [i for (i,) in connection.execute(
+        select(FlightSchedule.id).where(
+            tuple_(FlightSchedule.flight_id, FlightSchedule.dep_time).in_(
+                [(r['flight_id'], r['dep_time']) for r in rows]
+            )
+        )
+    ).all()]
+
+    # Chế độ "sparse": không tạo trước SeatAssignment
+    if not is_sparse_inventory():
+        create_seat_inventory(connection, schedule_ids)
+
+    # Insert bằng Core không đi qua sự kiện flush của ORM: cập nhật bảng đọc trực tiếp.
+    # refresh_flight_ids: các chuyến bay vừa đổi sân bay trung gian, tính lại mọi lịch bay của chúng
+    refresh_ids = set(schedule_ids)
+    if refresh_flight_ids:
+        refresh_ids.update(i for (i,) in connection.execute(
+            select(FlightSchedule.id).where(FlightSchedule.flight_id.in_(refresh_flight_ids))
+        ).all())
+    read_model.refresh(connection, refresh_ids)
+
+    routes = connection.execute(
+        select(FlightSearch.dep_province, FlightSearch.des_province).where(
+            FlightSearch.flight_schedule_id.in_(refresh_ids)
+        ).distinct()
+    ).all()
+
+    return schedule_ids, [tuple(r) for r in routes]
+
+
+def create_recurring_schedules(flight_id, dep_times, flight_time, business_class_seat_size, economy_class_seat_size,
+                               business_class_price, economy_class_price):
+    # Tạo nhiều lịch bay cho một chuyến bay trong một giao dịch.
+    # Trả về (số lịch bay đã tạo, các thời điểm bị bỏ qua vì đã được lập lịch)
+    if not dep_times:
+        raise ValueError("Không có ngày khởi hành nào phù hợp.")
+    if len(dep_times) > app.config["RECURRING_SCHEDULE_MAX"]:
+        raise ValueError(f"Chỉ được tạo tối đa {app.config['RECURRING_SCHEDULE_MAX']} lịch bay mỗi lần.")
+    if min(dep_times) < datetime.now():
+        raise ValueError("Ngày khởi hành không thể bằng hoặc nhỏ hơn ngày hiện tại!")
+
+    flight = db.session.get(Flight, flight_id)
+    if flight is None:
+        raise ValueError("Không tìm thấy chuyến bay.")
+
+    # Kiểm tra quy định một lần cho cả lô
+    FlightSchedule.validate(flight.airplane, get_latest_policy(), flight_time,
+                            business_class_seat_size, economy_class_seat_size,
+                            business_class_price, economy_class_price)
+
+    # Tìm lịch bị trùng bằng một truy vấn theo khoảng thời gian (dùng index flight_id, dep_time)
+    existing = {dep_time for (dep_time,) in db.session.query(FlightSchedule.dep_time).filter(
+        FlightSchedule.flight_id == flight_id,
+        FlightSchedule.dep_time >= min(dep_times),
+        FlightSchedule.dep_time <= max(dep_times)
+    ).all()}
+    skipped = sorted(d for d in set(dep_times) if d in existing)
+    dep_times = sorted(set(dep_times) - existing)
+    if not dep_times:
+        return 0, skipped
+
+    counts = seat_counts(flight.airplane_id)
+    rows = [{
+        'flight_id': flight_id,
+        'dep_time': dep_time,
+        'flight_time': flight_time,
+        'business_class_seat_size': business_class_seat_size,
+        'economy_class_seat_size': economy_class_seat_size,
+        'business_class_price': business_class_price,
+        'economy_class_price': economy_class_price,
+        'remaining_business_seats': min(business_class_seat_size, counts.get(TicketClass.Business_Class, 0)),
+        'remaining_economy_seats': min(economy_class_seat_size, counts.get(TicketClass.Economy_Class, 0)),
+    } for dep_time in dep_times]
+
+    try:
+        schedule_ids, routes = bulk_create_schedules(db.session.connection(), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for departure, destination in routes:
+        search_cache.invalidate_route(departure, destination)
+
+    return len(schedule_ids), skipped
+
+
+# Mã lỗi MySQL: 1205 = Lock wait timeout, 1213 = Deadlock found
+DEADLOCK_ERROR_CODES = (1205, 1213)
+
+
+def is_deadlock(ex):
+    orig = getattr(ex, 'orig', None)
+    return bool(orig is not None and orig.args and orig.args[0] in DEADLOCK_ERROR_CODES)
+
+
+def _claim_dense_seats(flight_schedule_id, seats):
+    # Khóa các ghế được chọn (SELECT ... FOR UPDATE) để hai giao dịch không thể cùng giữ một ghế
+    rows = db.session.query(SeatAssignment.id, SeatAssignment.seat_id).filter(
+        SeatAssignment.flight_schedule_id == flight_schedule_id,
+        SeatAssignment.is_available == True,
+        SeatAssignment.seat_id.in_(seats.keys())
+    ).with_for_update().all()
+
+    assignment_ids = {seats[seat_id]: assignment_id for assignment_id, seat_id in rows}
+    return assignment_ids, list(assignment_ids.values())
+
+
+def _claim_sparse_seats(schedule, seats, seat_class):
+    allotted = seat_allotment(schedule.airplane_id, seat_class, allotment_size(schedule, seat_class))
+    allotted_ids = {seat_id for (seat_id,) in db.session.query(allotted.c.id).all()}
+    seats = {seat_id: code for seat_id, code in seats.items() if seat_id in allotted_ids}
+
+    # Các dòng đã tồn tại (ghế đã bán, hoặc còn sót lại từ chế độ "dense")
+    rows = db.session.query(SeatAssignment.id, SeatAssignment.seat_id, SeatAssignment.is_available).filter(
+        SeatAssignment.flight_schedule_id == schedule.id,
+        SeatAssignment.seat_id.in_(seats.keys())
+    ).with_for_update().all()
+
+    assignment_ids = {seats[r.seat_id]: r.id for r in rows if r.is_available}
+    pending_ids = list(assignment_ids.values())
+    sold = {r.seat_id for r in rows if not r.is_available}
+
+    # Ghế chưa có dòng nào: thêm mới, ràng buộc uq_seat_flight chặn việc bán trùng
+    new_assignments = [
+        SeatAssignment(seat_id=seat_id, flight_schedule_id=schedule.id, is_available=False)
+        for seat_id in seats if seat_id not in sold and seats[seat_id] not in assignment_ids
+    ]
+    if new_assignments:
+        db.session.add_all(new_assignments)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            raise ValueError("Ghế không khả dụng, vui lòng chọn ghế khác.")
+        assignment_ids.update({seats[sa.seat_id]: sa.id for sa in new_assignments})
+
+    return assignment_ids, pending_ids
+
+
+def _claim_held_seats(flight_schedule_id, seats):
+    # Ghế đã được phiên này giữ: không phiên nào khác chọn được nên không cần khóa,
+    # câu UPDATE có điều kiện trong claim_seats vẫn chặn trường hợp ghế đã bán
+    rows = db.session.query(SeatAssignment.id, SeatAssignment.seat_id).filter(
+        SeatAssignment.flight_schedule_id == flight_schedule_id,
+        SeatAssignment.seat_id.in_(seats.keys())
+    ).all()
+
+    assignment_ids = {seats[seat_id]: assignment_id for assignment_id, seat_id in rows}
+    return assignment_ids, list(assignment_ids.values())
+
+
+def claim_seats(schedule, seat_codes, seat_class, hold_key=None, held=frozenset()):
+    seats = dict(db.session.query(Seat.id, Seat.seat_code).filter(
+        Seat.airplane_id == schedule.airplane_id,
+        Seat.seat_code.in_(seat_codes),
+        Seat.seat_class == seat_class
+    ).all())
+
+    if seats and held.issuperset(seats) and not is_sparse_inventory():
+        assignment_ids, pending_ids = _claim_held_seats(schedule.id, seats)
+    else:
+        # Bỏ các ghế đang được phiên khác giữ
+        others = holds.held_seat_ids(schedule.id, exclude_key=hold_key)
+        seats = {seat_id: code for seat_id, code in seats.items() if seat_id not in others}
+        if is_sparse_inventory():
+            assignment_ids, pending_ids = _claim_sparse_seats(schedule, seats, seat_class)
+        else:
+            assignment_ids, pending_ids = _claim_dense_seats(schedule.id, seats)
+
+    missing = [code for code in seat_codes if code not in assignment_ids]
+    if missing:
+        raise ValueError(f"Ghế không khả dụng: {', '.join(missing)}.")
+
+    # Cập nhật có điều kiện, kiểm tra rowcount để chắc chắn tất cả ghế đều được giữ
+    if pending_ids:
+        claimed = db.session.execute(
+            update(SeatAssignment).where(
+                SeatAssignment.id.in_(pending_ids),
+                SeatAssignment.is_available == True
+            ).values(is_available=False).execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(pending_ids):
+            raise ValueError("Ghế không khả dụng, vui lòng chọn ghế khác.")
+
+    return assignment_ids
+
+
+def remaining_seats_column(seat_class):
+    if seat_class == TicketClass.Business_Class:
+        return FlightSchedule.remaining_business_seats
+    return FlightSchedule.remaining_economy_seats
+
+
+def adjust_remaining_seats(flight_schedule_id, seat_class, delta):
+    # Cập nhật bộ đếm trong cùng giao dịch với việc giữ/trả ghế
+    column = remaining_seats_column(seat_class)
+    db.session.execute(
+        update(FlightSchedule).where(
+            FlightSchedule.id == flight_schedule_id
+        ).values({column: column + delta}).execution_options(synchronize_session=False)
+    )
+    read_model.adjust_remaining_seats(db.session.connection(), flight_schedule_id, seat_class, delta)
+
+
+def count_remaining_seats():
+    # Tính lại số ghế còn lại của từng lịch bay từ SeatAssignment
+    schedules = db.session.query(
+        FlightSchedule.id,
+        FlightSchedule.business_class_seat_size,
+        FlightSchedule.economy_class_seat_size,
+        FlightSchedule.remaining_business_seats,
+        FlightSchedule.remaining_economy_seats,
+        Flight.airplane_id
+    ).join(Flight, Flight.id == FlightSchedule.flight_id).all()
+
+    assignments = {}
+    for schedule_id, seat_class, total, sold in db.session.query(
+        SeatAssignment.flight_schedule_id,
+        Seat.seat_class,
+        func.count(SeatAssignment.id),
+        func.sum(case((SeatAssignment.is_available == False, 1), else_=0))
+    ).join(Seat, Seat.id == SeatAssignment.seat_id).group_by(
+        SeatAssignment.flight_schedule_id, Seat.seat_class
+    ).all():
+        assignments[(schedule_id, seat_class)] = (total, int(sold or 0))
+
+    airplane_seats = {
+        (airplane_id, seat_class): total
+        for airplane_id, seat_class, total in db.session.query(
+            Seat.airplane_id, Seat.seat_class, func.count(Seat.id)
+        ).group_by(Seat.airplane_id, Seat.seat_class).all()
+    }
+
+    counts = []
+    for s in schedules:
+        expected = {}
+        for seat_class, size in ((TicketClass.Business_Class, s.business_class_seat_size),
+                                 (TicketClass.Economy_Class, s.economy_class_seat_size)):
+            total, sold = assignments.get((s.id, seat_class), (0, 0))
+            if is_sparse_inventory():
+                total = min(size, airplane_seats.get((s.airplane_id, seat_class), 0))
+            expected[seat_class] = total - sold
+
+        counts.append({
+            'id': s.id,
+            'remaining_business_seats': expected[TicketClass.Business_Class],
+            'remaining_economy_seats': expected[TicketClass.Economy_Class],
+            'stored': (s.remaining_business_seats, s.remaining_economy_seats)
+        })
+
+    return counts
+
+
+def reconcile_remaining_seats(repair=False):
+    drift = [c for c in count_remaining_seats()
+             if c['stored'] != (c['remaining_business_seats'], c['remaining_economy_seats'])]
+
+    if repair and drift:
+        db.session.execute(update(FlightSchedule), [
+            {'id': c['id'],
+             'remaining_business_seats': c['remaining_business_seats'],
+             'remaining_economy_seats': c['remaining_economy_seats']}
+            for c in drift
+        ])
+        read_model.refresh(db.session.connection(), [c['id'] for c in drift])
+        db.session.commit()
+
+    return drift
+
+
+def _create_booking(user_id, flight_schedule_id, ticket_class, passengers, total, method, hold_key=None):
+    seat_codes = [p['seat_code'] for p in passengers]
+    if not seat_codes or not all(seat_codes):
+        raise ValueError("Thiếu mã ghế cho hành khách.")
+    if len(set(seat_codes)) != len(seat_codes):
+        raise ValueError("Mỗi hành khách phải chọn một ghế khác nhau.")
+
+    schedule = get_schedule_inventory(flight_schedule_id)
+    if not schedule:
+        raise ValueError(f"Không tìm thấy lịch bay {flight_schedule_id}.")
+
+    # Ghế phiên này đang giữ được chuyển thành vé; bị hoàn tác cùng giao dịch nếu đặt vé thất bại
+    held = holds.consume(schedule.id, hold_key) if hold_key else frozenset()
+    assignment_ids = claim_seats(schedule, seat_codes, ticket_class, hold_key, held)
+    adjust_remaining_seats(schedule.id, ticket_class, -len(assignment_ids))
+
+    # Thêm toàn bộ khách hàng, vé và hóa đơn trong cùng một lần flush
+    tickets = [
+        Ticket(
+            seat_assignment_id=assignment_ids[p['seat_code']],
+            user_id=user_id,
+            customer=Customer(name=p['name'], last_name=p['last_name'], gender=p['gender'], birthday=p['birthday']),
+            ticket_class=ticket_class
+        )
+        for p in passengers
+    ]
+
+    ticket_count = len(tickets)
+    receipt = Receipt(user_id=user_id, total=total, method=method, created_date=datetime.now())
+    receipt_detail = ReceiptDetail(
+        quantity=ticket_count,
+        unit_price=total // ticket_count,
+        receipt=receipt,
+        flight_route_id=schedule.flight_route_id
+    )
+
+    db.session.add_all(tickets)
+    db.session.add_all([receipt, receipt_detail])
+    db.session.flush()
+
+    record_revenue(receipt.created_date.date(), schedule.flight_route_id,
+                   receipt_detail.quantity * receipt_detail.unit_price, receipt_detail.quantity)
+
+    return receipt, schedule
+
+
+def record_revenue(day, flight_route_id, revenue, tickets):
+    # Cộng dồn vào dòng (ngày, tuyến bay) bằng một câu upsert theo từng hệ CSDL
+    values = {'day': day, 'flight_route_id': flight_route_id, 'revenue': revenue, 'tickets': tickets, 'receipts': 1}
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(RevenueDaily).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            revenue=RevenueDaily.revenue + stmt.inserted.revenue,
+            tickets=RevenueDaily.tickets + stmt.inserted.tickets,
+            receipts=RevenueDaily.receipts + stmt.inserted.receipts
+        )
+        connection.execute(stmt)
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert_insert
+        stmt = upsert_insert(RevenueDaily).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RevenueDaily.day, RevenueDaily.flight_route_id],
+            set_={
+                'revenue': RevenueDaily.revenue + stmt.excluded.revenue,
+                'tickets': RevenueDaily.tickets + stmt.excluded.tickets,
+                'receipts': RevenueDaily.receipts + stmt.excluded.receipts
+            }
+        )
+        connection.execute(stmt)
+    else:
+        updated = connection.execute(update(RevenueDaily).where(
+            RevenueDaily.day == day, RevenueDaily.flight_route_id == flight_route_id
+        ).values(
+            revenue=RevenueDaily.revenue + revenue,
+            tickets=RevenueDaily.tickets + tickets,
+            receipts=RevenueDaily.receipts + 1
+        ))
+        if updated.rowcount == 0:
+            connection.execute(insert(RevenueDaily).values(values))
+
+
+def rebuild_revenue_rollup():
+    # Tính lại toàn bộ bảng revenue_daily từ Receipt/ReceiptDetail
+    connection = db.session.connection()
+    day = func.date(Receipt.created_date)
+    connection.execute(delete(RevenueDaily))
+    connection.execute(insert(RevenueDaily).from_select(
+        ['day', 'flight_route_id', 'revenue', 'tickets', 'receipts'],
+        select(
+            day,
+            ReceiptDetail.flight_route_id,
+            func.sum(ReceiptDetail.quantity * ReceiptDetail.unit_price),
+            func.sum(ReceiptDetail.quantity),
+            func.count(Receipt.id)
+        ).join(
+            ReceiptDetail, ReceiptDetail.receipt_id == Receipt.id
+        ).group_by(day, ReceiptDetail.flight_route_id)
+    ))
+    db.session.commit()
+    return db.session.query(RevenueDaily).count()
+
+
+def create_booking(user_id, flight_schedule_id, ticket_class, passengers, total, method, hold_key=None):
+    # Giữ ghế, tạo vé và hóa đơn trong một giao dịch duy nhất, tự thử lại khi gặp deadlock
+    retries = app.config.get("BOOKING_MAX_RETRIES", 3)
+    for attempt in range(retries + 1):
+        try:
+            receipt, schedule = _create_booking(user_id, flight_schedule_id, ticket_class, passengers, total,
+                                                method, hold_key)
+            db.session.commit()
+            if seatmap.is_enabled():
+                seatmap.mark_sold(flight_schedule_id, [p['seat_code'] for p in passengers])
+            # Số ghế còn lại đã thay đổi: hủy các kết quả tìm kiếm chứa lịch bay này
+            search_cache.invalidate_schedule(int(flight_schedule_id), departure_date=schedule.dep_time.date())
+            return receipt
+        except OperationalError as ex:
+            db.session.rollback()
+            if not is_deadlock(ex) or attempt == retries:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def revenue_stats():
+    # Alias cho bảng Airport và Province
+    dep_airport = aliased(Airport)  # Sân bay đi
+    des_airport = aliased(Airport)  # Sân bay đến
+    dep_province = aliased(Province)  # Tỉnh nơi đi
+    des_province = aliased(Province)  # Tỉnh nơi đến
+
+    # Đọc từ bảng gộp revenue_daily thay vì toàn bộ lịch sử hóa đơn
+    return (db.session.query(
+                FlightRoute.id.label('flight_route_id'),
+                func.sum(RevenueDaily.revenue),
+                dep_province.name,
+                des_province.name
+            )
+            .join(RevenueDaily, RevenueDaily.flight_route_id == FlightRoute.id)
+            .join(dep_airport, dep_airport.id == FlightRoute.dep_airport_id)
+            .join(dep_province, dep_province.id == dep_airport.province_id)
+            .join(des_airport, des_airport.id == FlightRoute.des_airport_id)
+            .join(des_province, des_province.id == des_airport.province_id)
+            .group_by(
+                FlightRoute.id,  # Nhóm theo ID tuyến bay
+                dep_province.name,  # Nhóm theo tên tỉnh nơi đi
+                des_province.name  # Nhóm theo tên tỉnh nơi đến
+            )
+            .all())
+
+
+def revenue_month(time='month', year=None):
+    year = year or datetime.now().year
+    return db.session.query(
+                func.extract(time, RevenueDaily.day),
+                func.sum(RevenueDaily.revenue)
+            ) \
+            .filter(RevenueDaily.day >= datetime(year, 1, 1).date(),
+                    RevenueDaily.day < datetime(year + 1, 1, 1).date()) \
+            .group_by(func.extract(time, RevenueDaily.day)) \
+            .order_by(func.extract(time, RevenueDaily.day)) \
+            .all()
+
+
+def revenue_year(time='year'):
+    return db.session.query(
+        func.extract(time, RevenueDaily.day),
+        func.sum(RevenueDaily.revenue)
+    ).group_by(
+        func.extract(time, RevenueDaily.day)
+    ).order_by(
+        func.extract(time, RevenueDaily.day)
+    ).all()
+
+
+if __name__ == '__main__':
+    with app.app_context():
         print(load_flight_routes('11'))
\ No newline at end of file
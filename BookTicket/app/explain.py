@@ -0,0 +1,110 @@
+import click
+from sqlalchemy import event
+from app import app, db, dao, policy, connections
+from app.models import FlightSearch, FlightSchedule, Flight, FlightRoute, User, TicketClass
+
+
+def capture(fn, *args):
+    # Ghi lại các câu SELECT mà hàm DAO gửi tới DB
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn(*args)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    return statements
+
+
+def full_scans(statement, parameters):
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()]
+        # Quét theo thứ tự rowid kèm LIMIT (vd. ORDER BY id DESC LIMIT 1) dừng ngay sau vài dòng
+        if ' LIMIT ' in statement.upper() and not any('TEMP B-TREE' in detail for detail in plan):
+            return []
+        return [detail for detail in plan if detail.startswith('SCAN') and 'INDEX' not in detail]
+
+    plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+    # Bảng dẫn xuất (<derivedN>) được đọc từ bộ nhớ tạm, không tính là quét bảng
+    return [f"{row['table']} (type=ALL, rows={row['rows']})" for row in plan
+            if row['type'] == 'ALL' and not str(row['table']).startswith('<')]
+
+
+def claim_and_rollback(flight_schedule_id, seat_class):
+    # Giữ thử một ghế rồi hoàn tác, chỉ để lấy các câu truy vấn của luồng đặt vé
+    seats = dao.get_available_seats(flight_schedule_id, seat_class)
+    try:
+        if seats:
+            dao.claim_seats(dao.get_schedule_inventory(flight_schedule_id), [seats[0].seat_code], seat_class)
+    finally:
+        db.session.rollback()
+
+
+def hot_queries():
+    search = db.session.query(FlightSearch).order_by(FlightSearch.dep_time.desc()).first()
+    schedule = db.session.query(FlightSchedule.id, FlightSchedule.flight_id).order_by(FlightSchedule.id.desc()).first()
+    flight = db.session.query(Flight.flight_code, FlightRoute.dep_airport_id, FlightRoute.des_airport_id).join(
+        FlightRoute, FlightRoute.id == Flight.flight_route_id).first()
+    user = db.session.query(User.username).first()
+
+    queries = []
+    if search:
+        queries.append(('load_flights', dao.query_flights,
+                        (search.dep_province, search.des_province, search.dep_time.date())))
+        queries.append(('load_fare_calendar', dao.query_fare_calendar,
+                        (search.dep_province, search.des_province, [search.dep_time.date()])))
+        queries.append(('search_flights_page', dao.search_flights_page,
+                        (search.dep_province, search.des_province, search.dep_time.date(), 1, 'price')))
+        queries.append(('connections.load_day', connections.load_day, (search.dep_time.date(),)))
+    if schedule:
+        queries += [
+            ('get_available_seats', dao.get_available_seats, (schedule.id, TicketClass.Economy_Class)),
+            ('claim_seats', claim_and_rollback, (schedule.id, TicketClass.Economy_Class)),
+            ('get_dep_time', dao.get_dep_time, (schedule.flight_id,)),
+        ]
+    if flight:
+        queries.append(('get_flight_by_code_and_airports', dao.get_flight_by_code_and_airports, tuple(flight)))
+    if user:
+        queries.append(('auth_user', dao.auth_user, (user.username, '')))
+    queries += [
+        ('get_latest_policy', policy.load, ()),
+        ('revenue_month', dao.revenue_month, ()),
+    ]
+    return queries
+
+
+def check(allow=()):
+    # (tên truy vấn, câu SQL, các bước quét toàn bộ bảng) cho mỗi câu SELECT của các truy vấn DAO chính
+    # Đọc thẳng từ DB, không qua bitmap ghế
+    bitmap_dir, app.config["SEAT_BITMAP_DIR"] = app.config["SEAT_BITMAP_DIR"], None
+    try:
+        return [
+            (name, statement, [s for s in full_scans(statement, parameters) if not any(table in s for table in allow)])
+            for name, fn, args in hot_queries()
+            for statement, parameters in capture(fn, *args)
+        ]
+    finally:
+        app.config["SEAT_BITMAP_DIR"] = bitmap_dir
+
+
+@app.cli.command("explain-check")
+@click.option("--allow", multiple=True, help="Bảng nhỏ được phép quét toàn bộ (có thể lặp lại).")
+def explain_check_command(allow):
+    """Chạy EXPLAIN cho các truy vấn DAO chính, báo lỗi nếu có truy vấn quét toàn bộ bảng."""
+    failures = 0
+    for name, statement, scans in check(allow):
+        if scans:
+            failures += 1
+            click.echo(f"[FAIL] {name}: {', '.join(scans)}")
+            click.echo(f"       {' '.join(statement.split())}")
+        else:
+            click.echo(f"[OK]   {name}")
+
+    if failures:
+        raise click.ClickException(f"{failures} truy vấn quét toàn bộ bảng.")
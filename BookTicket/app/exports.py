@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from datetime import datetime, date
+from enum import Enum
+from sqlalchemy import select
+from app import app, db
+from app.models import (Receipt, ReceiptDetail, Ticket, Customer, SeatAssignment, Seat, FlightSchedule, Flight,
+                        RevenueDaily)
+
+
+def receipts_query(start, end):
+    return select(
+        Receipt.id, Receipt.created_date, Receipt.user_id, Receipt.total, Receipt.method,
+        ReceiptDetail.flight_route_id, ReceiptDetail.quantity, ReceiptDetail.unit_price
+    ).join(
+        ReceiptDetail, ReceiptDetail.receipt_id == Receipt.id
+    ).where(
+        Receipt.created_date >= start, Receipt.created_date < end
+    ).order_by(Receipt.id)
+
+
+def tickets_query(start, end):
+    return select(
+        Ticket.id, Ticket.date_created, Ticket.user_id, Ticket.ticket_class,
+        Customer.last_name, Customer.name, Customer.gender, Customer.birthday,
+        Seat.seat_code, FlightSchedule.id.label('flight_schedule_id'), Flight.flight_code, FlightSchedule.dep_time
+    ).join(
+        Customer, Customer.id == Ticket.customer_id
+    ).join(
+        SeatAssignment, SeatAssignment.id == Ticket.seat_assignment_id
+    ).join(
+        Seat, Seat.id == SeatAssignment.seat_id
+    ).join(
+        FlightSchedule, FlightSchedule.id == SeatAssignment.flight_schedule_id
+    ).join(
+        Flight, Flight.id == FlightSchedule.flight_id
+    ).where(
+        Ticket.date_created >= start, Ticket.date_created < end
+    ).order_by(Ticket.id)
+
+
+def revenue_query(start, end):
+    # Doanh thu theo ngày x tuyến bay từ bảng gộp revenue_daily
+    return select(
+        RevenueDaily.day, RevenueDaily.flight_route_id, RevenueDaily.revenue, RevenueDaily.tickets,
+        RevenueDaily.receipts
+    ).where(
+        RevenueDaily.day >= start.date(), RevenueDaily.day < end.date()
+    ).order_by(RevenueDaily.day, RevenueDaily.flight_route_id)
+
+
+EXPORTS = {
+    'receipts': receipts_query,
+    'tickets': tickets_query,
+    'revenue': revenue_query,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def stream_rows(dataset, start, end):
+    # Đọc bằng con trỏ phía server theo từng đợt EXPORT_YIELD_PER dòng, không nạp cả kết quả vào bộ nhớ
+    stmt = EXPORTS[dataset](start, end).execution_options(yield_per=app.config["EXPORT_YIELD_PER"])
+    result = db.session.execute(stmt)
+    yield list(result.keys())
+    for row in result:
+        yield [_value(v) for v in row]
+
+
+def generate(dataset, start, end, fmt):
+    rows = stream_rows(dataset, start, end)
+    header = next(rows)
+
+    if fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), ensure_ascii=False) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % app.config["EXPORT_YIELD_PER"] == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
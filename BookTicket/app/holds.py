@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+import click
+from flask import session
+from sqlalchemy import insert, delete
+from app import app, db
+from app.models import SeatHold
+
+_lock = threading.Lock()
+_state = {'sweeper': None}
+
+
+def session_key():
+    # Khóa giữ ghế của phiên trình duyệt hiện tại, lưu trong session của Flask
+    key = session.get('seat_hold_key')
+    if key is None:
+        key = session['seat_hold_key'] = uuid.uuid4().hex
+    return key
+
+
+def held_seat_ids(flight_schedule_id, exclude_key=None):
+    # Các ghế đang được giữ (chưa hết hạn), trừ các ghế của phiên exclude_key
+    query = db.session.query(SeatHold.seat_id).filter(
+        SeatHold.flight_schedule_id == flight_schedule_id,
+        SeatHold.expires_at > datetime.now()
+    )
+    if exclude_key:
+        query = query.filter(SeatHold.hold_key != exclude_key)
+    return {seat_id for (seat_id,) in query.all()}
+
+
+def own_seat_ids(flight_schedule_id, key):
+    return {seat_id for (seat_id,) in db.session.query(SeatHold.seat_id).filter(
+        SeatHold.flight_schedule_id == flight_schedule_id,
+        SeatHold.hold_key == key,
+        SeatHold.expires_at > datetime.now()
+    ).all()}
+
+
+def place(flight_schedule_id, seat_ids, key):
+    # Thay các ghế phiên này đang giữ trên lịch bay bằng seat_ids, hết hạn sau SEAT_HOLD_TTL giây.
+    # Ghế đang được phiên khác giữ làm câu INSERT vi phạm khóa chính (IntegrityError), bên gọi xử lý.
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=app.config["SEAT_HOLD_TTL"])
+    db.session.execute(delete(SeatHold).where(
+        SeatHold.flight_schedule_id == flight_schedule_id,
+        SeatHold.hold_key == key
+    ))
+    if seat_ids:
+        # Hết hạn thì coi như không còn giữ, không cần chờ luồng dọn dẹp
+        db.session.execute(delete(SeatHold).where(
+            SeatHold.flight_schedule_id == flight_schedule_id,
+            SeatHold.seat_id.in_(seat_ids),
+            SeatHold.expires_at <= now
+        ))
+        db.session.execute(insert(SeatHold), [
+            {'flight_schedule_id': flight_schedule_id, 'seat_id': seat_id, 'hold_key': key, 'expires_at': expires_at}
+            for seat_id in seat_ids
+        ])
+    start_sweeper()
+    return expires_at
+
+
+def consume(flight_schedule_id, key):
+    # Gọi trong giao dịch đặt vé: xóa các ghế phiên này đang giữ, trả về các ghế còn hạn
+    held = own_seat_ids(flight_schedule_id, key)
+    db.session.execute(delete(SeatHold).where(
+        SeatHold.flight_schedule_id == flight_schedule_id,
+        SeatHold.hold_key == key
+    ))
+    return held
+
+
+def sweep():
+    # Xóa các ghế giữ đã hết hạn
+    deleted = db.session.execute(delete(SeatHold).where(SeatHold.expires_at <= datetime.now())).rowcount
+    db.session.commit()
+    return deleted
+
+
+def _sweep_forever():
+    while True:
+        time.sleep(app.config["SEAT_HOLD_SWEEP_SECONDS"])
+        try:
+            with app.app_context():
+                sweep()
+        except Exception as ex:
+            app.logger.warning("Dọn ghế giữ hết hạn thất bại: %s", ex)
+
+
+def start_sweeper():
+    # Luồng nền dọn dẹp định kỳ, khởi động ở lần giữ ghế đầu tiên của tiến trình
+    with _lock:
+        if _state['sweeper'] is None:
+            _state['sweeper'] = threading.Thread(target=_sweep_forever, name='seat-hold-sweeper', daemon=True)
+            _state['sweeper'].start()
+
+
+@app.cli.command("holds-sweep")
+def sweep_command():
+    """Xóa các ghế giữ đã hết hạn."""
+    click.echo(f"Đã xóa {sweep()} ghế giữ hết hạn.")
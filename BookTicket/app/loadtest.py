@@ -0,0 +1,366 @@
+import http.client
+import http.cookiejar
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+import click
+from sqlalchemy import func
+from app import app, db, dao, policy
+from app.models import User, UserRole, FlightSearch, SeatAssignment, Ticket, ReceiptDetail
+
+STEPS = ('login', 'search', 'booking', 'add_data')
+
+
+class _FormParser(HTMLParser):
+    # Lấy các form (action, input hidden) và các option của thẻ select trong trang
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.options = {}
+        self.selected = {}
+        self._select = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self.forms.append({'action': attrs.get('action'), 'fields': {}})
+        elif tag == 'input' and attrs.get('type') == 'hidden' and self.forms and attrs.get('name'):
+            self.forms[-1]['fields'][attrs['name']] = attrs.get('value') or ''
+        elif tag == 'select':
+            self._select = attrs.get('name')
+        elif tag == 'option' and self._select and attrs.get('value'):
+            self.options.setdefault(self._select, []).append(attrs['value'])
+            if 'selected' in attrs:
+                self.selected[self._select] = attrs['value']
+
+    def handle_endtag(self, tag):
+        if tag == 'select':
+            self._select = None
+
+
+def parse_page(html):
+    parser = _FormParser()
+    parser.feed(html)
+    return parser
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Giữ nguyên phản hồi 302: /add_data chuyển hướng khi ghế đã bị người khác giữ
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    # Nearest-rank: giá trị nhỏ nhất mà ít nhất p% số mẫu không lớn hơn
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+class Stats:
+    # Độ trễ và kết quả (ok / conflict / error) của từng bước, dùng chung giữa các luồng
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.outcomes = {step: {'ok': 0, 'conflict': 0, 'error': 0} for step in STEPS}
+        self.errors = {}
+        self.booked_seats = []
+        self.elapsed = 0.0
+
+    def record(self, step, elapsed, outcome, detail=None):
+        with self._lock:
+            self.latencies[step].append(elapsed)
+            self.outcomes[step][outcome] += 1
+            if outcome == 'error':
+                key = f"{step}: {detail}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def record_booking(self, seat_codes):
+        with self._lock:
+            self.booked_seats += seat_codes
+
+
+class VirtualUser:
+    # Một khách hàng: đăng nhập, tìm chuyến bay, mở trang đặt vé, gửi form /add_data
+    def __init__(self, base_url, stats, username, password, target, passengers, hot_seats, rng, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.username = username
+        self.password = password
+        self.target = target
+        self.passengers = passengers
+        self.hot_seats = hot_seats
+        self.rng = rng
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, step, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            try:
+                with self.opener.open(self.base_url + path, data=body, timeout=self.timeout) as response:
+                    status, location, text = response.status, None, response.read().decode('utf-8', 'replace')
+            except urllib.error.HTTPError as ex:
+                status, location, text = ex.code, ex.headers.get('Location'), ex.read().decode('utf-8', 'replace')
+        # Lỗi kết nối/timeout (OSError) hoặc phản hồi hỏng (vd. IncompleteRead) tính là lỗi của bước này
+        except (OSError, http.client.HTTPException) as ex:
+            self.stats.record(step, time.perf_counter() - started, 'error', type(ex).__name__)
+            return None
+        return status, location, text, time.perf_counter() - started
+
+    def login(self):
+        result = self.request('login', '/login', {'username': self.username, 'password': self.password})
+        if result is None:
+            return False
+        status, location, text, elapsed = result
+        ok = status == 302 and not (location or '').endswith('/login')
+        self.stats.record('login', elapsed, 'ok' if ok else 'error',
+                          None if ok else f"HTTP {status} {location or ''}".strip())
+        return ok
+
+    def book_once(self):
+        # Trả về False khi lịch bay đã hết ghế (dừng khách hàng này)
+        target = self.target
+        result = self.request('search', '/search?' + urllib.parse.urlencode({
+            'departure': target['departure'], 'destination': target['destination'],
+            'departure_date': target['departure_date'], 'passenger': self.passengers}))
+        if result is None:
+            return True
+        status, location, text, elapsed = result
+        forms = [f['fields'] for f in parse_page(text).forms if f['action'] == '/booking'] if status == 200 else []
+        form = next((f for f in forms if f.get('flight_schedule_id') == str(target['flight_schedule_id'])
+                     and f.get('class') == 'Economy_Class'), None)
+        self.stats.record('search', elapsed, 'ok' if form else 'error',
+                          None if form else f"HTTP {status}, không thấy lịch bay {target['flight_schedule_id']}")
+        if not form:
+            return True
+
+        result = self.request('booking', '/booking?' + urllib.parse.urlencode(form))
+        if result is None:
+            return True
+        status, location, text, elapsed = result
+        if status == 404:
+            # "No available seats": đã bán hết
+            self.stats.record('booking', elapsed, 'conflict')
+            return False
+        if status != 200:
+            self.stats.record('booking', elapsed, 'error', f"HTTP {status}")
+            return True
+        page = parse_page(text)
+        seats = page.options.get('seat_0', [])
+        payment = next((f['fields'] for f in page.forms if f['action'] == '/add_data'), None)
+        if not payment:
+            self.stats.record('booking', elapsed, 'error', "không có form /add_data")
+            return True
+        if len(seats) < self.passengers:
+            # Không còn đủ ghế cho số hành khách này
+            self.stats.record('booking', elapsed, 'conflict')
+            return False
+        self.stats.record('booking', elapsed, 'ok')
+
+        # Dùng các ghế trang đặt vé đã giữ sẵn cho phiên này; nếu không có thì chọn trong vài ghế
+        # đầu danh sách để các khách hàng tranh nhau cùng ghế như thực tế
+        chosen = [page.selected.get(f'seat_{i}') for i in range(self.passengers)]
+        if not all(chosen) or len(set(chosen)) != len(chosen):
+            chosen = self.rng.sample(seats[:max(self.hot_seats, self.passengers)], self.passengers)
+        data = dict(payment, payment_method='bank')
+        for i, seat_code in enumerate(chosen):
+            data.update({f'passenger_name_{i}': f"Nguyen Van {self.username}", f'passenger_id_{i}': f"0790{i:08d}",
+                         f'passenger_birth_{i}': '1990-01-01', f'passenger_gender_{i}': 'Male',
+                         f'seat_{i}': seat_code})
+        result = self.request('add_data', '/add_data', data)
+        if result is None:
+            return True
+        status, location, text, elapsed = result
+        if status == 200:
+            self.stats.record('add_data', elapsed, 'ok')
+            self.stats.record_booking(chosen)
+        elif status == 302:
+            # Ghế vừa bị khách hàng khác giữ: flash lỗi và chuyển hướng về trang đặt vé
+            self.stats.record('add_data', elapsed, 'conflict')
+        else:
+            self.stats.record('add_data', elapsed, 'error', f"HTTP {status}")
+        return True
+
+
+def pick_target(flight_schedule_id=None, passengers=1):
+    # Mặc định chọn lịch bay còn ít ghế phổ thông nhất trong số lịch bay còn được đặt vé
+    query = db.session.query(FlightSearch)
+    if flight_schedule_id:
+        row = query.filter(FlightSearch.flight_schedule_id == flight_schedule_id).first()
+    else:
+        bookable = datetime.now() + timedelta(hours=policy.current().ticket_booking_time, minutes=30)
+        row = query.filter(
+            FlightSearch.dep_time > bookable,
+            FlightSearch.remaining_economy_seats >= passengers
+        ).order_by(FlightSearch.remaining_economy_seats, FlightSearch.flight_schedule_id).first()
+    if row is None:
+        raise ValueError("Không tìm thấy lịch bay phù hợp để chạy thử tải.")
+    return {'flight_schedule_id': row.flight_schedule_id, 'departure': row.dep_province,
+            'destination': row.des_province, 'departure_date': row.dep_time.strftime('%Y-%m-%d'),
+            'remaining_economy_seats': row.remaining_economy_seats}
+
+
+def sold_seat_count(flight_schedule_id):
+    return db.session.query(func.count(SeatAssignment.id)).filter(
+        SeatAssignment.flight_schedule_id == flight_schedule_id,
+        SeatAssignment.is_available.is_(False)
+    ).scalar()
+
+
+def run(base_url, target, usernames, password='123456', passengers=1, hot_seats=3, duration=30, iterations=None,
+        seed=1, timeout=30):
+    stats = Stats()
+    rng = random.Random(seed)
+    users = [VirtualUser(base_url, stats, username, password, target, passengers, hot_seats,
+                         random.Random(rng.random()), timeout) for username in usernames]
+    barrier = threading.Barrier(len(users))
+    deadline = {}
+
+    def worker(user):
+        try:
+            logged_in = user.login()
+        except BaseException:
+            # Lỗi bất ngờ trước barrier: hủy barrier để các khách hàng khác không chờ mãi
+            barrier.abort()
+            raise
+        try:
+            # Mọi khách hàng bắt đầu đặt vé cùng lúc để tạo tranh chấp
+            barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            # Có khách hàng lỗi hoặc đăng nhập quá lâu: bắt đầu ngay, không chờ nhau nữa
+            pass
+        deadline.setdefault('at', time.perf_counter() + duration)
+        if not logged_in:
+            return
+        count = 0
+        while time.perf_counter() < deadline['at'] and (iterations is None or count < iterations):
+            count += 1
+            if not user.book_once():
+                break
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(users)) as executor:
+        list(executor.map(worker, users))
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def verify(target, sold_before, booked_seats):
+    # Kiểm tra sau khi chạy: không ghế nào bán hai lần, số vé khớp hóa đơn và bộ đếm ghế
+    problems = []
+    schedule_id = target['flight_schedule_id']
+
+    duplicated = db.session.query(Ticket.seat_assignment_id).group_by(Ticket.seat_assignment_id).having(
+        func.count(Ticket.id) > 1).count()
+    if duplicated:
+        problems.append(f"{duplicated} ghế có nhiều hơn một vé.")
+    if len(booked_seats) != len(set(booked_seats)):
+        problems.append("Cùng một ghế được xác nhận đặt thành công cho nhiều khách hàng.")
+
+    ticketed = db.session.query(func.count(Ticket.id)).join(
+        SeatAssignment, SeatAssignment.id == Ticket.seat_assignment_id
+    ).filter(SeatAssignment.flight_schedule_id == schedule_id).scalar()
+    sold = sold_seat_count(schedule_id)
+    if ticketed != sold:
+        problems.append(f"Lịch bay {schedule_id}: {sold} ghế đã bán nhưng có {ticketed} vé.")
+    if sold - sold_before != len(booked_seats):
+        problems.append(f"Lịch bay {schedule_id}: bán thêm {sold - sold_before} ghế, "
+                        f"khách hàng nhận xác nhận {len(booked_seats)} ghế.")
+
+    tickets = db.session.query(func.count(Ticket.id)).scalar()
+    receipt_tickets = db.session.query(func.coalesce(func.sum(ReceiptDetail.quantity), 0)).scalar()
+    if tickets != receipt_tickets:
+        problems.append(f"Có {tickets} vé nhưng hóa đơn ghi {receipt_tickets} vé.")
+
+    if any(c['id'] == schedule_id for c in dao.reconcile_remaining_seats()):
+        problems.append(f"Bộ đếm ghế còn lại của lịch bay {schedule_id} bị lệch.")
+    return problems
+
+
+def report(stats, target, problems):
+    steps = {}
+    for step in STEPS:
+        latencies = stats.latencies[step]
+        steps[step] = dict(stats.outcomes[step], requests=len(latencies), **{
+            f'p{p}_ms': round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)})
+    attempts = sum(stats.outcomes['add_data'].values())
+    requests = sum(len(v) for v in stats.latencies.values())
+    return {
+        'flight_schedule_id': target['flight_schedule_id'],
+        'seconds': round(stats.elapsed, 2),
+        'requests_per_second': round(requests / stats.elapsed, 1) if stats.elapsed else 0,
+        'bookings_per_second': round(stats.outcomes['add_data']['ok'] / stats.elapsed, 1) if stats.elapsed else 0,
+        'seats_booked': len(stats.booked_seats),
+        'conflict_rate': round(stats.outcomes['add_data']['conflict'] / attempts, 3) if attempts else 0,
+        'error_rate': round(sum(o['error'] for o in stats.outcomes.values()) / requests, 3) if requests else 0,
+        'steps': steps,
+        'errors': stats.errors,
+        'problems': problems,
+    }
+
+
+@app.cli.command("loadtest")
+@click.option("--url", default="http://127.0.0.1:5000", show_default=True, help="Địa chỉ ứng dụng đang chạy.")
+@click.option("--clients", type=int, default=50, show_default=True, help="Số khách hàng đặt vé đồng thời.")
+@click.option("--duration", type=float, default=30, show_default=True, help="Số giây tối đa.")
+@click.option("--iterations", type=int, help="Số lần đặt vé tối đa của mỗi khách hàng.")
+@click.option("--schedule", "flight_schedule_id", type=int,
+              help="Lịch bay bị tranh chấp (mặc định: lịch còn ít ghế phổ thông nhất).")
+@click.option("--passengers", type=int, default=1, show_default=True, help="Số vé mỗi lần đặt.")
+@click.option("--hot-seats", type=int, default=3, show_default=True,
+              help="Khách hàng chọn ngẫu nhiên trong chừng này ghế trống đầu tiên.")
+@click.option("--password", default="123456", show_default=True, help="Mật khẩu của các tài khoản khách hàng.")
+@click.option("--seed", "seed_value", type=int, default=1, show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="In kết quả dạng JSON.")
+def loadtest_command(url, clients, duration, iterations, flight_schedule_id, passengers, hot_seats, password,
+                     seed_value, as_json):
+    """Cho nhiều khách hàng cùng đặt vé một lịch bay, đo độ trễ và kiểm tra tính đúng đắn sau khi chạy."""
+    try:
+        target = pick_target(flight_schedule_id, passengers)
+    except ValueError as ex:
+        raise click.ClickException(str(ex))
+    usernames = [u for (u,) in db.session.query(User.username).filter(
+        User.user_role == UserRole.USER, User.active.is_(True)).order_by(User.id).limit(clients).all()]
+    if not usernames:
+        raise click.ClickException("Không có tài khoản khách hàng, chạy `flask seed` trước.")
+    sold_before = sold_seat_count(target['flight_schedule_id'])
+    db.session.rollback()
+
+    if not as_json:
+        click.echo(f"Lịch bay {target['flight_schedule_id']} ({target['departure']} - {target['destination']}, "
+                   f"{target['departure_date']}), còn {target['remaining_economy_seats']} ghế phổ thông, "
+                   f"{len(usernames)} khách hàng.")
+    stats = run(url, target, usernames, password, passengers, hot_seats, duration, iterations, seed_value)
+    db.session.expire_all()
+    result = report(stats, target, verify(target, sold_before, stats.booked_seats))
+
+    if as_json:
+        click.echo(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        click.echo(f"{result['seconds']} giây, {result['requests_per_second']} request/giây, "
+                   f"{result['bookings_per_second']} lượt đặt vé/giây, {result['seats_booked']} ghế đã bán, "
+                   f"tỉ lệ tranh chấp {result['conflict_rate']:.1%}, tỉ lệ lỗi {result['error_rate']:.1%}")
+        click.echo(f"{'bước':<10}{'request':>9}{'ok':>7}{'conflict':>10}{'error':>7}"
+                   f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for step, s in result['steps'].items():
+            click.echo(f"{step:<10}{s['requests']:>9}{s['ok']:>7}{s['conflict']:>10}{s['error']:>7}"
+                       f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+        for error, count in result['errors'].items():
+            click.echo(f"Lỗi {error}: {count}", err=True)
+        for problem in result['problems']:
+            click.echo(f"SAI: {problem}", err=True)
+
+    if result['problems']:
+        raise SystemExit(1)
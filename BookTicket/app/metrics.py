@@ -0,0 +1,65 @@
+import hmac
+from flask import request, abort
+from app import app, pool, search_cache, principal
+
+
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {value}")
+
+
+def render():
+    # Định dạng văn bản của Prometheus, số liệu của riêng worker trả lời request
+    lines = []
+    stats = pool.snapshot()
+
+    _metric(lines, 'db_pool_size', 'gauge', 'Configured pool size.', [('', stats['size'])])
+    _metric(lines, 'db_pool_checked_out', 'gauge', 'Connections currently checked out.',
+            [('', stats['checked_out'])])
+    _metric(lines, 'db_pool_checked_in', 'gauge', 'Idle connections in the pool.', [('', stats['checked_in'])])
+    _metric(lines, 'db_pool_overflow', 'gauge', 'Overflow connections currently open.', [('', stats['overflow'])])
+    _metric(lines, 'db_pool_overflow_max', 'gauge', 'Highest overflow seen since start.',
+            [('', stats['max_overflow_used'])])
+    for key, help_text in (('checkouts', 'Connections checked out.'),
+                           ('checkins', 'Connections returned to the pool.'),
+                           ('connects', 'New DBAPI connections opened.'),
+                           ('invalidations', 'Connections invalidated (stale or broken).'),
+                           ('timeouts', 'Checkouts that timed out waiting for a connection.')):
+        _metric(lines, f'db_pool_{key}_total', 'counter', help_text, [('', stats[key])])
+
+    buckets = [(f'{{le="{bound}"}}', count) for bound, count in zip(pool.WAIT_BUCKETS, stats['wait_buckets'])]
+    buckets.append(('{le="+Inf"}', stats['wait_count']))
+    lines.append("# HELP db_pool_wait_seconds Time spent waiting for a pooled connection.")
+    lines.append("# TYPE db_pool_wait_seconds histogram")
+    lines += [f"db_pool_wait_seconds_bucket{labels} {value}" for labels, value in buckets]
+    lines.append(f"db_pool_wait_seconds_sum {stats['wait_sum']:.6f}")
+    lines.append(f"db_pool_wait_seconds_count {stats['wait_count']}")
+
+    caches = {'search': search_cache.flights, 'fare_calendar': search_cache.calendars, 'user': principal.users}
+    for key, kind in (('size', 'gauge'), ('hits', 'counter'), ('misses', 'counter'),
+                      ('evictions', 'counter'), ('invalidations', 'counter')):
+        name = f'app_cache_{key}' if kind == 'gauge' else f'app_cache_{key}_total'
+        _metric(lines, name, kind, f'In-process cache {key}.',
+                [(f'{{cache="{cache}"}}', c.stats()[key]) for cache, c in caches.items()])
+
+    return "\n".join(lines) + "\n"
+
+
+def authorized():
+    # Chỉ dành cho hệ thống giám sát nội bộ: cần token, và đúng địa chỉ IP nếu có cấu hình danh sách IP
+    token = app.config["METRICS_TOKEN"]
+    if not token:
+        return False
+    allowed_ips = app.config["METRICS_ALLOWED_IPS"]
+    if allowed_ips and request.remote_addr not in allowed_ips:
+        return False
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+@app.route('/metrics')
+def metrics_view():
+    if not authorized():
+        abort(404)
+    return app.response_class(render(), mimetype='text/plain; version=0.0.4')
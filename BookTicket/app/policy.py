@@ -0,0 +1,45 @@
+import threading
+import time
+import zlib
+from collections import namedtuple
+from app import app, db
+from app.models import Policy
+
+FIELDS = [c.name for c in Policy.__table__.columns]
+
+# Bản chụp bất biến của quy định mới nhất. version được tính từ nội dung
+# nên mọi worker đọc cùng một dòng Policy sẽ có cùng version.
+PolicySnapshot = namedtuple('PolicySnapshot', FIELDS + ['version'])
+
+_lock = threading.Lock()
+_state = {'snapshot': None, 'loaded_at': 0.0}
+
+
+def load():
+    row = db.session.query(Policy).order_by(Policy.id.desc()).first()
+    if row is None:
+        return None
+
+    values = [getattr(row, f) for f in FIELDS]
+    version = f"{row.id}-{zlib.crc32(repr(values).encode()):08x}"
+    return PolicySnapshot(*values, version=version)
+
+
+def current():
+    # Chỉ đọc lại DB khi chưa có bản chụp, vừa bị hủy, hoặc quá POLICY_REVALIDATE_SECONDS
+    # (để các worker khác cũng nhận được thay đổi từ trang admin)
+    now = time.monotonic()
+    snapshot = _state['snapshot']
+    if snapshot is not None and now - _state['loaded_at'] < app.config["POLICY_REVALIDATE_SECONDS"]:
+        return snapshot
+
+    with _lock:
+        if _state['snapshot'] is snapshot:
+            _state['snapshot'] = load()
+            _state['loaded_at'] = now
+        return _state['snapshot']
+
+
+def invalidate():
+    with _lock:
+        _state['snapshot'] = None
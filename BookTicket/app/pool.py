@@ -0,0 +1,79 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Các mốc (giây) của histogram thời gian chờ lấy kết nối
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+_lock = threading.Lock()
+stats = {
+    'checkouts': 0,
+    'checkins': 0,
+    'connects': 0,
+    'invalidations': 0,
+    'timeouts': 0,
+    'wait_count': 0,
+    'wait_sum': 0.0,
+    'wait_buckets': [0] * len(WAIT_BUCKETS),
+    'max_overflow_used': 0,
+}
+_pools = []
+
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool đo thời gian chờ lấy kết nối (SQLAlchemy không có sự kiện cho việc này)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.append(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            with _lock:
+                stats['timeouts'] += 1
+            raise
+
+        waited = time.perf_counter() - start
+        with _lock:
+            stats['wait_count'] += 1
+            stats['wait_sum'] += waited
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    stats['wait_buckets'][i] += 1
+            stats['max_overflow_used'] = max(stats['max_overflow_used'], self.overflow())
+        return connection
+
+    def recreate(self):
+        # Pool mới (vd. sau dispose) thay thế pool cũ trong số liệu
+        new_pool = super().recreate()
+        if self in _pools:
+            _pools.remove(self)
+        return new_pool
+
+
+def _count(name):
+    def listener(*args):
+        with _lock:
+            stats[name] += 1
+    return listener
+
+
+event.listen(InstrumentedQueuePool, 'checkout', _count('checkouts'))
+event.listen(InstrumentedQueuePool, 'checkin', _count('checkins'))
+event.listen(InstrumentedQueuePool, 'connect', _count('connects'))
+event.listen(InstrumentedQueuePool, 'invalidate', _count('invalidations'))
+
+
+def snapshot():
+    # Số liệu cộng dồn và trạng thái hiện tại của các pool trong tiến trình
+    with _lock:
+        result = dict(stats, wait_buckets=list(stats['wait_buckets']))
+    result['size'] = sum(p.size() for p in _pools)
+    result['checked_out'] = sum(p.checkedout() for p in _pools)
+    result['checked_in'] = sum(p.checkedin() for p in _pools)
+    result['overflow'] = sum(max(p.overflow(), 0) for p in _pools)
+    return result
@@ -0,0 +1,57 @@
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import app, db
+from app.cache import TTLCache
+from app.models import User
+
+# Thông tin người dùng đăng nhập theo id, dùng cho @login.user_loader thay vì truy vấn User mỗi request.
+# Mỗi worker có cache riêng: TTL ngắn giới hạn thời gian dữ liệu cũ khi người dùng bị sửa ở worker khác.
+users = TTLCache(maxsize=app.config.get("USER_CACHE_SIZE", 4096), ttl=app.config.get("USER_CACHE_TTL", 30))
+
+
+class UserPrincipal(UserMixin):
+    # Chỉ giữ các trường mà template và bộ lọc is_staff cần
+    def __init__(self, id, username, name, avatar, user_role, active):
+        self.id = id
+        self.username = username
+        self.name = name
+        self.avatar = avatar
+        self.user_role = user_role
+        self.active = active
+
+    def get_object(self):
+        # Đối tượng User đầy đủ, chỉ nạp khi route thực sự cần
+        return db.session.get(User, self.id)
+
+
+def _fetch(user_id):
+    row = db.session.query(
+        User.id, User.username, User.name, User.avatar, User.user_role, User.active
+    ).filter(User.id == user_id).first()
+    return UserPrincipal(*row) if row else None
+
+
+def load(user_id):
+    user_id = int(user_id)
+    return users.get_or_set(user_id, lambda: _fetch(user_id), tags=lambda principal: [('user', user_id)])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault('user_changes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changed = session.info.pop('user_changes', None)
+    if changed:
+        users.invalidate(*[('user', i) for i in changed])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('user_changes', None)
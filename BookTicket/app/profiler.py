@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, request, has_request_context, jsonify, abort
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app, metrics
+
+slow_log = logging.getLogger('app.sql.slow')
+log = logging.getLogger('app.sql')
+
+_lock = threading.Lock()
+# endpoint -> {'requests', 'queries', 'db_time', 'n_plus_one', 'statements': {dạng câu lệnh: [số lần, thời gian]}}
+endpoints = {}
+
+
+def enabled():
+    return app.config.get("SQL_PROFILER_ENABLED", False)
+
+
+def statement_shape(statement):
+    # Gộp các câu lệnh chỉ khác nhau ở tham số: bỏ khoảng trắng thừa, danh sách IN, hằng số
+    shape = ' '.join(statement.split())
+    shape = re.sub(r"\(\s*(\?|%s|%\(\w+\)s)(\s*,\s*(\?|%s|%\(\w+\)s))*\s*\)", "(?)", shape)
+    shape = re.sub(r"\b\d+\b", "?", shape)
+    return shape
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if enabled():
+        conn.info.setdefault('profiler_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profiler_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    in_request = has_request_context() and 'sql_profile' in g
+    if in_request:
+        profile = g.sql_profile
+        profile['queries'] += 1
+        profile['db_time'] += elapsed
+        shape = statement_shape(statement)
+        profile['shapes'][shape] += 1
+        profile['shape_time'][shape] = profile['shape_time'].get(shape, 0.0) + elapsed
+
+    if elapsed * 1000 >= app.config["SQL_SLOW_QUERY_MS"]:
+        slow_log.warning(json.dumps({
+            'event': 'slow_query',
+            'endpoint': request.endpoint if in_request else None,
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': ' '.join(statement.split()),
+            'parameters': repr(parameters)[:500],
+        }, ensure_ascii=False))
+
+
+@app.before_request
+def _start_profile():
+    if enabled():
+        g.sql_profile = {'queries': 0, 'db_time': 0.0, 'shapes': Counter(), 'shape_time': {}}
+
+
+@app.after_request
+def _finish_profile(response):
+    profile = g.pop('sql_profile', None)
+    if profile is None:
+        return response
+
+    # URL không khớp route nào (vd. 404) gom chung một khóa để số mục thống kê không tăng theo URL lạ
+    endpoint = request.endpoint or '<unmatched>'
+    # Cùng một dạng câu lệnh lặp lại nhiều lần trong một request: nhiều khả năng là N+1
+    repeated = [(shape, count) for shape, count in profile['shapes'].items()
+                if count >= app.config["SQL_N_PLUS_ONE_THRESHOLD"]]
+    for shape, count in repeated:
+        log.warning(json.dumps({'event': 'n_plus_one', 'endpoint': endpoint, 'count': count, 'statement': shape},
+                               ensure_ascii=False))
+
+    with _lock:
+        stats = endpoints.setdefault(endpoint, {'requests': 0, 'queries': 0, 'db_time': 0.0, 'n_plus_one': 0,
+                                                'statements': {}})
+        stats['requests'] += 1
+        stats['queries'] += profile['queries']
+        stats['db_time'] += profile['db_time']
+        stats['n_plus_one'] += len(repeated)
+        for shape, count in profile['shapes'].items():
+            entry = stats['statements'].setdefault(shape, [0, 0.0])
+            entry[0] += count
+            entry[1] += profile['shape_time'][shape]
+
+    if app.debug:
+        response.headers.add('Server-Timing',
+                             f'db;dur={profile["db_time"] * 1000:.1f};desc="{profile["queries"]} queries"')
+    return response
+
+
+def report(top=None):
+    top = top or app.config["SQL_PROFILER_TOP"]
+    with _lock:
+        return {
+            endpoint: {
+                'requests': s['requests'],
+                'queries_per_request': round(s['queries'] / s['requests'], 2),
+                'db_ms_per_request': round(s['db_time'] * 1000 / s['requests'], 2),
+                'n_plus_one': s['n_plus_one'],
+                'top_statements': [
+                    {'statement': shape, 'count': count, 'total_ms': round(total * 1000, 2)}
+                    for shape, (count, total) in sorted(s['statements'].items(), key=lambda i: i[1][1],
+                                                        reverse=True)[:top]
+                ],
+            }
+            for endpoint, s in endpoints.items()
+        }
+
+
+@app.route('/metrics/sql')
+def sql_profile_view():
+    # Số liệu của worker trả lời request, cùng giới hạn truy cập với /metrics
+    if not metrics.authorized():
+        abort(404)
+    return jsonify(report())
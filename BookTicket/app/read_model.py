@@ -0,0 +1,163 @@
+import click
+from sqlalchemy import event, select, insert, delete, update, func, case, or_
+from sqlalchemy.orm import Session, aliased
+from app import app, db
+from app.sql import add_minutes
+from app.models import (Province, Airport, Flight, FlightRoute, FlightSchedule, IntermediateAirport, Airplane,
+                        FlightSearch, TicketClass)
+
+COLUMNS = [
+    'flight_schedule_id', 'flight_id', 'flight_code', 'dep_province', 'des_province', 'departure_airport',
+    'destination_airport', 'dep_time', 'arrival_time', 'flight_time', 'business_price', 'economy_price',
+    'airplane_name', 'airline_name', 'remaining_business_seats', 'remaining_economy_seats',
+    'intermediate_airport_1', 'ia_stop_time_1', 'intermediate_airport_2', 'ia_stop_time_2'
+]
+
+
+def projection(schedule_ids=None):
+    # Khai báo các alias cho các bảng
+    departure_airport = aliased(Airport)
+    destination_airport = aliased(Airport)
+    departure_province = aliased(Province)
+    destination_province = aliased(Province)
+
+    # Subquery để lấy thông tin các sân bay trung gian
+    stops = select(
+        IntermediateAirport.flight_id.label('flight_id'),
+        Airport.name.label('airport_name'),
+        IntermediateAirport.stop_time.label('stop_time'),
+        func.row_number().over(
+            partition_by=IntermediateAirport.flight_id,
+            order_by=IntermediateAirport.stop_time
+        ).label('rn')
+    ).join(Airport, IntermediateAirport.airport_id == Airport.id).where(IntermediateAirport.stop_time.isnot(None))
+    if schedule_ids is not None:
+        stops = stops.where(IntermediateAirport.flight_id.in_(
+            select(FlightSchedule.flight_id).where(FlightSchedule.id.in_(schedule_ids))
+        ))
+    ranked_airports = stops.subquery()
+
+    query = select(
+        FlightSchedule.id,
+        Flight.id,
+        Flight.flight_code,
+        departure_province.name,
+        destination_province.name,
+        departure_airport.name,
+        destination_airport.name,
+        FlightSchedule.dep_time,
+        add_minutes(FlightSchedule.dep_time, FlightSchedule.flight_time),
+        FlightSchedule.flight_time,
+        FlightSchedule.business_class_price,
+        FlightSchedule.economy_class_price,
+        Airplane.name,
+        Airplane.airplane_type,
+        FlightSchedule.remaining_business_seats,
+        FlightSchedule.remaining_economy_seats,
+        func.max(case((ranked_airports.c.rn == 1, ranked_airports.c.airport_name))),
+        func.max(case((ranked_airports.c.rn == 1, ranked_airports.c.stop_time))),
+        func.max(case((ranked_airports.c.rn == 2, ranked_airports.c.airport_name))),
+        func.max(case((ranked_airports.c.rn == 2, ranked_airports.c.stop_time)))
+    ).select_from(Flight).join(
+        FlightSchedule, Flight.id == FlightSchedule.flight_id
+    ).join(
+        FlightRoute, Flight.flight_route_id == FlightRoute.id
+    ).join(
+        departure_airport, FlightRoute.dep_airport_id == departure_airport.id
+    ).join(
+        destination_airport, FlightRoute.des_airport_id == destination_airport.id
+    ).join(
+        Airplane, Flight.airplane_id == Airplane.id
+    ).join(
+        departure_province, departure_airport.province_id == departure_province.id
+    ).join(
+        destination_province, destination_airport.province_id == destination_province.id
+    ).outerjoin(
+        ranked_airports, ranked_airports.c.flight_id == Flight.id
+    ).group_by(
+        FlightSchedule.id,
+        Flight.id,
+        Flight.flight_code,
+        departure_province.name,
+        destination_province.name,
+        departure_airport.name,
+        destination_airport.name,
+        FlightSchedule.dep_time,
+        FlightSchedule.flight_time,
+        FlightSchedule.business_class_price,
+        FlightSchedule.economy_class_price,
+        Airplane.name,
+        Airplane.airplane_type,
+        FlightSchedule.remaining_business_seats,
+        FlightSchedule.remaining_economy_seats
+    )
+
+    if schedule_ids is not None:
+        query = query.where(FlightSchedule.id.in_(schedule_ids))
+
+    return query
+
+
+def refresh(connection, schedule_ids=None):
+    # Tính lại các dòng của những lịch bay được chỉ định (None = toàn bộ bảng)
+    if schedule_ids is not None:
+        schedule_ids = list(schedule_ids)
+        if not schedule_ids:
+            return
+        connection.execute(delete(FlightSearch).where(FlightSearch.flight_schedule_id.in_(schedule_ids)))
+    else:
+        connection.execute(delete(FlightSearch))
+
+    connection.execute(insert(FlightSearch).from_select(COLUMNS, projection(schedule_ids)))
+
+
+def adjust_remaining_seats(connection, flight_schedule_id, seat_class, delta):
+    column = FlightSearch.remaining_business_seats if seat_class == TicketClass.Business_Class \
+        else FlightSearch.remaining_economy_seats
+    connection.execute(
+        update(FlightSearch).where(
+            FlightSearch.flight_schedule_id == flight_schedule_id
+        ).values({column: column + delta})
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync(session, flush_context):
+    schedule_ids, flight_ids, route_ids, airplane_ids = set(), set(), set(), set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Airport, Province)):
+            # Hiếm khi thay đổi: dựng lại toàn bộ
+            refresh(session.connection())
+            return
+        elif isinstance(obj, FlightSchedule):
+            schedule_ids.add(obj.id)
+        elif isinstance(obj, Flight):
+            flight_ids.add(obj.id)
+        elif isinstance(obj, IntermediateAirport):
+            flight_ids.add(obj.flight_id)
+        elif isinstance(obj, FlightRoute):
+            route_ids.add(obj.id)
+        elif isinstance(obj, Airplane):
+            airplane_ids.add(obj.id)
+
+    if flight_ids or route_ids or airplane_ids:
+        schedule_ids.update(i for (i,) in session.connection().execute(
+            select(FlightSchedule.id).join(Flight, Flight.id == FlightSchedule.flight_id).where(or_(
+                Flight.id.in_(flight_ids),
+                Flight.flight_route_id.in_(route_ids),
+                Flight.airplane_id.in_(airplane_ids)
+            ))
+        ).all())
+
+    schedule_ids.discard(None)
+    if schedule_ids:
+        refresh(session.connection(), schedule_ids)
+
+
+@app.cli.command("search-rebuild")
+def rebuild_command():
+    """Dựng lại toàn bộ bảng flight_search từ các bảng gốc."""
+    refresh(db.session.connection())
+    db.session.commit()
+    click.echo(f"Đã dựng lại {db.session.query(FlightSearch).count()} dòng flight_search.")
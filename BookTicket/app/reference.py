@@ -0,0 +1,63 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from app import app, db
+from app.models import Province, Airport, Flight, FlightRoute, Airplane
+
+ProvinceRow = namedtuple('ProvinceRow', ['id', 'name'])
+AirportRow = namedtuple('AirportRow', ['id', 'name', 'add', 'province_id'])
+AirplaneRow = namedtuple('AirplaneRow', ['id', 'name', 'airplane_type', 'business_class_seat_size',
+                                         'economy_class_seat_size'])
+RouteRow = namedtuple('RouteRow', ['id', 'dep_airport_id', 'des_airport_id'])
+
+# Dữ liệu tra cứu gần như không đổi (tỉnh, sân bay, mã chuyến bay, máy bay, tuyến bay), mỗi worker nạp một lần.
+# document là bản JSON phục vụ /api/reference, version là ETag của nó.
+ReferenceSnapshot = namedtuple('ReferenceSnapshot', ['provinces', 'airports', 'flight_codes', 'airplanes', 'routes',
+                                                     'document', 'version'])
+
+_lock = threading.Lock()
+_state = {'snapshot': None, 'loaded_at': 0.0}
+
+
+def load():
+    provinces = [ProvinceRow(*r) for r in db.session.query(Province.id, Province.name).order_by(Province.name)]
+    airports = [AirportRow(*r) for r in db.session.query(
+        Airport.id, Airport.name, Airport.add, Airport.province_id).order_by(Airport.id)]
+    flight_codes = [code for (code,) in db.session.query(Flight.flight_code).distinct().order_by(Flight.flight_code)]
+    airplanes = [AirplaneRow(*r) for r in db.session.query(
+        Airplane.id, Airplane.name, Airplane.airplane_type, Airplane.business_class_seat_size,
+        Airplane.economy_class_seat_size).order_by(Airplane.id)]
+    routes = [RouteRow(*r) for r in db.session.query(
+        FlightRoute.id, FlightRoute.dep_airport_id, FlightRoute.des_airport_id).order_by(FlightRoute.id)]
+
+    document = json.dumps({
+        'provinces': [p._asdict() for p in provinces],
+        'airports': [a._asdict() for a in airports],
+        'flight_codes': flight_codes,
+        'airplanes': [dict(a._asdict(), airplane_type=a.airplane_type.name) for a in airplanes],
+        'routes': [r._asdict() for r in routes],
+    }, ensure_ascii=False, sort_keys=True)
+    version = hashlib.sha1(document.encode()).hexdigest()[:16]
+
+    return ReferenceSnapshot(provinces, airports, flight_codes, airplanes, routes, document, version)
+
+
+def current():
+    # Đọc lại DB khi bị hủy từ trang admin, hoặc quá REFERENCE_REVALIDATE_SECONDS (cho các worker khác)
+    now = time.monotonic()
+    snapshot = _state['snapshot']
+    if snapshot is not None and now - _state['loaded_at'] < app.config["REFERENCE_REVALIDATE_SECONDS"]:
+        return snapshot
+
+    with _lock:
+        if _state['snapshot'] is snapshot:
+            _state['snapshot'] = load()
+            _state['loaded_at'] = now
+        return _state['snapshot']
+
+
+def invalidate():
+    with _lock:
+        _state['snapshot'] = None
@@ -0,0 +1,139 @@
+from datetime import datetime, date
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, aliased
+from app import app
+from app.cache import TTLCache
+from app.models import (Province, Airport, Flight, FlightRoute, FlightSchedule, IntermediateAirport, Airplane)
+
+# Kết quả load_flights theo (nơi đi, nơi đến, ngày đi).
+# Mỗi worker có cache riêng: TTL ngắn giới hạn thời gian dữ liệu cũ ở các worker khác.
+flights = TTLCache(maxsize=app.config.get("SEARCH_CACHE_SIZE", 1024), ttl=app.config.get("SEARCH_CACHE_TTL", 60))
+
+# Lịch giá theo (nơi đi, nơi đến, ngày bắt đầu, số ngày)
+calendars = TTLCache(maxsize=app.config.get("SEARCH_CACHE_SIZE", 1024), ttl=app.config.get("SEARCH_CACHE_TTL", 60))
+
+# Các hàm được gọi khi một tuyến/ngày thay đổi: callback(dep_province, des_province, dep_date)
+# (tỉnh là None khi chỉ biết ngày, ngày là None khi thay đổi cả tuyến, tất cả là None khi hủy toàn bộ)
+listeners = []
+
+
+def normalize_date(departure_date):
+    if isinstance(departure_date, datetime):
+        return departure_date.date()
+    if isinstance(departure_date, date):
+        return departure_date
+    return datetime.strptime(str(departure_date).strip(), '%Y-%m-%d').date()
+
+
+def make_key(departure, destination, departure_date):
+    return (departure or '').strip(), (destination or '').strip(), normalize_date(departure_date)
+
+
+def tags_for(key, results):
+    departure, destination, departure_date = key
+    return [('route', departure, destination), ('route', departure, destination, departure_date)] + \
+        [('schedule', f['flight_schedule_id']) for f in results]
+
+
+def calendar_tags(departure, destination, days):
+    return [('route', departure, destination)] + [('route', departure, destination, d) for d in days]
+
+
+def invalidate_schedule(*flight_schedule_ids, departure_date=None):
+    flights.invalidate(*[('schedule', i) for i in flight_schedule_ids])
+    # Số ghế còn lại thay đổi ngoài ORM (vd. đặt vé): báo cho listener theo ngày đi của lịch bay
+    if departure_date is not None:
+        for listener in listeners:
+            listener(None, None, departure_date)
+
+
+def invalidate_route(departure, destination, departure_date=None):
+    tag = ('route', departure, destination) if departure_date is None else \
+        ('route', departure, destination, departure_date)
+    flights.invalidate(tag)
+    calendars.invalidate(tag)
+    for listener in listeners:
+        listener(departure, destination, departure_date)
+
+
+def _route_provinces(connection, flight_ids):
+    dep_airport = aliased(Airport)
+    des_airport = aliased(Airport)
+    dep_province = aliased(Province)
+    des_province = aliased(Province)
+
+    rows = connection.execute(
+        select(Flight.id, dep_province.name, des_province.name)
+        .join(FlightRoute, FlightRoute.id == Flight.flight_route_id)
+        .join(dep_airport, dep_airport.id == FlightRoute.dep_airport_id)
+        .join(des_airport, des_airport.id == FlightRoute.des_airport_id)
+        .join(dep_province, dep_province.id == dep_airport.province_id)
+        .join(des_province, des_province.id == des_airport.province_id)
+        .where(Flight.id.in_(flight_ids))
+    ).all()
+    return {flight_id: (dep, des) for flight_id, dep, des in rows}
+
+
+def _history(obj, attr):
+    # Giá trị hiện tại và giá trị cũ (nếu vừa bị sửa) của một thuộc tính
+    state = obj._sa_instance_state
+    history = state.attrs[attr].history
+    values = list(history.added or ()) + list(history.unchanged or ()) + list(history.deleted or ())
+    return {v for v in values if v is not None} or {getattr(obj, attr)}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault('search_changes', {
+        'flights': {}, 'routes': {}, 'schedules': set(), 'all': False
+    })
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (FlightRoute, Airport, Province, Airplane)):
+            changed['all'] = True
+        elif isinstance(obj, FlightSchedule):
+            changed['schedules'].add(obj.id)
+            for flight_id in _history(obj, 'flight_id'):
+                changed['flights'].setdefault(flight_id, set()).update(
+                    d.date() for d in _history(obj, 'dep_time')
+                )
+        elif isinstance(obj, Flight):
+            # Chuyến bay chuyển sang tuyến khác thì không biết tuyến cũ, hủy toàn bộ
+            if obj._sa_instance_state.attrs['flight_route_id'].history.deleted:
+                changed['all'] = True
+            changed['flights'].setdefault(obj.id, set()).add(None)
+        elif isinstance(obj, IntermediateAirport):
+            changed['flights'].setdefault(obj.flight_id, set()).add(None)
+
+    # Tra cứu tỉnh đi/đến ngay trong giao dịch hiện tại (sau commit không còn truy vấn được)
+    missing = [i for i in changed['flights'] if i is not None and i not in changed['routes']]
+    if missing and not changed['all']:
+        changed['routes'].update(_route_provinces(session.connection(), missing))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changed = session.info.pop('search_changes', None)
+    if not changed:
+        return
+
+    if changed['all']:
+        flights.clear()
+        calendars.clear()
+        for listener in listeners:
+            listener(None, None, None)
+        return
+
+    invalidate_schedule(*[i for i in changed['schedules'] if i is not None])
+    for flight_id, dates in changed['flights'].items():
+        route = changed['routes'].get(flight_id)
+        if route is None:
+            continue
+        for departure_date in (dates if None not in dates else {None}):
+            invalidate_route(route[0], route[1], departure_date)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('search_changes', None)
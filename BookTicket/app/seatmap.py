@@ -0,0 +1,201 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có flock, chỉ dùng được với một tiến trình
+    fcntl = None
+
+import click
+from app import app, db
+from app.models import Seat, SeatAssignment, FlightSchedule, Flight, TicketClass
+
+# Mỗi lịch bay có một file: header + 1 bit cho mỗi ghế (1 = đã bán).
+# Thứ tự bit (ordinal) cố định: các ghế Business được mở bán rồi tới Economy, sắp theo Seat.id.
+HEADER = struct.Struct('<4sIII')  # magic, airplane_id, business_class_seat_size, economy_class_seat_size
+MAGIC = b'SMAP'
+
+SeatSlot = namedtuple('SeatSlot', ['id', 'seat_code', 'seat_class'])
+
+_airplane_seats = {}
+_layouts = {}
+
+
+def is_enabled():
+    return bool(app.config.get("SEAT_BITMAP_DIR"))
+
+
+def _path(flight_schedule_id):
+    return os.path.join(app.config["SEAT_BITMAP_DIR"], f"{flight_schedule_id}.bits")
+
+
+@contextmanager
+def _locked(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def layout(airplane_id, business_class_seat_size, economy_class_seat_size):
+    key = (airplane_id, business_class_seat_size, economy_class_seat_size)
+    if key not in _layouts:
+        if airplane_id not in _airplane_seats:
+            rows = db.session.query(Seat.id, Seat.seat_code, Seat.seat_class).filter(
+                Seat.airplane_id == airplane_id
+            ).order_by(Seat.id).all()
+            _airplane_seats[airplane_id] = [SeatSlot(*r) for r in rows]
+
+        seats = _airplane_seats[airplane_id]
+        business = [s for s in seats if s.seat_class == TicketClass.Business_Class][:business_class_seat_size]
+        economy = [s for s in seats if s.seat_class == TicketClass.Economy_Class][:economy_class_seat_size]
+        _layouts[key] = business + economy
+
+    return _layouts[key]
+
+
+def build(flight_schedule_id):
+    schedule = db.session.query(
+        FlightSchedule.business_class_seat_size,
+        FlightSchedule.economy_class_seat_size,
+        Flight.airplane_id
+    ).join(Flight, Flight.id == FlightSchedule.flight_id).filter(FlightSchedule.id == flight_schedule_id).first()
+    if not schedule:
+        return False
+
+    slots = layout(schedule.airplane_id, schedule.business_class_seat_size, schedule.economy_class_seat_size)
+
+    os.makedirs(app.config["SEAT_BITMAP_DIR"], exist_ok=True)
+    fd = os.open(_path(flight_schedule_id), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        # Giữ khóa trong lúc đọc DB để không ghi đè các bit do tiến trình khác vừa đánh dấu
+        with _locked(fd):
+            sold = {seat_id for (seat_id,) in db.session.query(SeatAssignment.seat_id).filter(
+                SeatAssignment.flight_schedule_id == flight_schedule_id,
+                SeatAssignment.is_available == False
+            ).all()}
+
+            bits = bytearray((len(slots) + 7) // 8)
+            for ordinal, slot in enumerate(slots):
+                if slot.id in sold:
+                    bits[ordinal >> 3] |= 1 << (ordinal & 7)
+
+            data = HEADER.pack(MAGIC, schedule.airplane_id, schedule.business_class_seat_size,
+                               schedule.economy_class_seat_size) + bytes(bits)
+            os.ftruncate(fd, len(data))
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, data)
+    finally:
+        os.close(fd)
+
+    return True
+
+
+@contextmanager
+def _mapped(flight_schedule_id, write=False):
+    try:
+        fd = os.open(_path(flight_schedule_id), os.O_RDWR if write else os.O_RDONLY)
+    except FileNotFoundError:
+        yield None
+        return
+
+    try:
+        with _locked(fd) if write else _unlocked():
+            size = os.fstat(fd).st_size
+            if size <= HEADER.size:
+                yield None
+                return
+            with mmap.mmap(fd, size, access=mmap.ACCESS_WRITE if write else mmap.ACCESS_READ) as m:
+                magic, airplane_id, business_size, economy_size = HEADER.unpack_from(m)
+                if magic != MAGIC:
+                    yield None
+                    return
+                yield m, layout(airplane_id, business_size, economy_size)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _unlocked():
+    yield
+
+
+def _read(flight_schedule_id, callback):
+    for attempt in range(2):
+        with _mapped(flight_schedule_id) as mapped:
+            if mapped:
+                m, slots = mapped
+                return callback(m, slots)
+        # Chưa có bitmap (hoặc đang được tạo): dựng lại từ SeatAssignment
+        if attempt or not build(flight_schedule_id):
+            return None
+
+
+def _is_sold(m, ordinal):
+    return m[HEADER.size + (ordinal >> 3)] & (1 << (ordinal & 7))
+
+
+def available_seats(flight_schedule_id, seat_class):
+    return _read(flight_schedule_id, lambda m, slots: [
+        slot for ordinal, slot in enumerate(slots)
+        if slot.seat_class == seat_class and not _is_sold(m, ordinal)
+    ])
+
+
+def remaining_seats(flight_schedule_id):
+    def count(m, slots):
+        remaining = {TicketClass.Business_Class: 0, TicketClass.Economy_Class: 0}
+        for ordinal, slot in enumerate(slots):
+            if not _is_sold(m, ordinal):
+                remaining[slot.seat_class] += 1
+        return remaining
+
+    return _read(flight_schedule_id, count)
+
+
+def _set_seats(flight_schedule_id, seat_codes, sold):
+    seat_codes = set(seat_codes)
+    with _mapped(flight_schedule_id, write=True) as mapped:
+        # Bitmap chưa được tạo thì sẽ được dựng từ DB ở lần đọc kế tiếp
+        if not mapped:
+            return
+        m, slots = mapped
+        for ordinal, slot in enumerate(slots):
+            if slot.seat_code in seat_codes:
+                offset = HEADER.size + (ordinal >> 3)
+                if sold:
+                    m[offset] |= 1 << (ordinal & 7)
+                else:
+                    m[offset] &= ~(1 << (ordinal & 7)) & 0xFF
+
+
+def mark_sold(flight_schedule_id, seat_codes):
+    _set_seats(flight_schedule_id, seat_codes, sold=True)
+
+
+def mark_available(flight_schedule_id, seat_codes):
+    _set_seats(flight_schedule_id, seat_codes, sold=False)
+
+
+def rebuild_all(since=None):
+    schedule_ids = db.session.query(FlightSchedule.id).filter(
+        FlightSchedule.dep_time >= (since or datetime.now())
+    ).all()
+    for (schedule_id,) in schedule_ids:
+        build(schedule_id)
+    return len(schedule_ids)
+
+
+@app.cli.command("seatmap-rebuild")
+def rebuild_command():
+    """Dựng lại bitmap ghế của các lịch bay chưa khởi hành từ SeatAssignment."""
+    if not is_enabled():
+        raise click.ClickException("SEAT_BITMAP_DIR chưa được cấu hình.")
+    click.echo(f"Đã dựng lại {rebuild_all()} bitmap.")
@@ -0,0 +1,295 @@
+import hashlib
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta
+import click
+from sqlalchemy import insert
+from app import app, db, dao, read_model, search_cache, policy, reference, seatmap
+from app.models import (User, UserRole, Province, Airport, FlightRoute, Airplane, Airline, Seat, Flight,
+                        FlightSchedule, SeatAssignment, IntermediateAirport, Customer, Ticket, Receipt,
+                        ReceiptDetail, Policy, Gender, Method, TicketClass)
+
+PROVINCES = ["TP HCM", "Hà Nội", "Đà Nẵng", "Nghệ An", "Cần Thơ", "Hải Phòng", "Lâm Đồng", "Quảng Ninh",
+             "Khánh Hòa", "Đồng Nai"]
+
+AIRPORTS = [
+    {"name": "Tân Sơn Nhất", "add": "Phường 2, 4 và 15, Quận Tân Bình"},
+    {"name": "Nội Bài", "add": "Số 200 đường Phạm Văn Đồng, Hà Nội"},
+    {"name": "Đà Nẵng", "add": "Số 02 đường Duy Tân, Quận Hải Châu, Đà Nẵng"},
+    {"name": "Vinh", "add": "Số 1 đường Nguyễn Sỹ Sách, TP Vinh, Nghệ An"},
+    {"name": "Cần Thơ", "add": "Số 60 đường Mậu Thân, Cần Thơ"},
+    {"name": "Cát Bì", "add": "Số 15 đường Nguyễn Đức Cảnh, Hải Phòng"},
+    {"name": "Liên Khương", "add": "Xã Liên Nghĩa, Huyện Đức Trọng, Lâm Đồng"},
+    {"name": "Vân Đồn", "add": "Số 28 đường Vân Đồn, Quảng Ninh"},
+    {"name": "Cam Ranh", "add": "Sân bay Cam Ranh, Phường Cam Nghĩa, TP Cam Ranh, Khánh Hòa"},
+    {"name": "Long Thành", "add": "Xã Long Thanh, Huyện Long Thành, tỉnh Đồng Nai"},
+]
+
+AIRPLANES = [
+    {"name": "Airbus A320", "airplane_type": Airline.VietNam_Airline,
+     "business_class_seat_size": 5 * 4, "economy_class_seat_size": 10 * 6},
+    {"name": "Boeing 787", "airplane_type": Airline.Bamboo_AirWays,
+     "business_class_seat_size": 5 * 5, "economy_class_seat_size": 10 * 7},
+    {"name": "Airbus A321", "airplane_type": Airline.Vietjet_Air,
+     "business_class_seat_size": 6 * 4, "economy_class_seat_size": 14 * 6},
+    {"name": "Boeing 737", "airplane_type": Airline.VietNam_Airline,
+     "business_class_seat_size": 4 * 4, "economy_class_seat_size": 10 * 6},
+    {"name": "Airbus A380", "airplane_type": Airline.Bamboo_AirWays,
+     "business_class_seat_size": 5 * 6, "economy_class_seat_size": 8 * 8},
+    {"name": "Boeing 777", "airplane_type": Airline.VietNam_Airline,
+     "business_class_seat_size": 5 * 5, "economy_class_seat_size": 7 * 7},
+    {"name": "Embraer E195", "airplane_type": Airline.Vietjet_Air,
+     "business_class_seat_size": 5 * 4, "economy_class_seat_size": 8 * 6},
+]
+
+# Tiền tố mã chuyến bay theo hãng
+FLIGHT_CODE_PREFIX = {Airline.VietNam_Airline: "VN", Airline.Vietjet_Air: "VJ", Airline.Bamboo_AirWays: "BB"}
+
+ACCOUNTS = [
+    ("admin", UserRole.ADMIN, "https://res.cloudinary.com/dnoubiojc/image/upload/v1735048518/admin.jpg"),
+    ("staff", UserRole.STAFF, "https://res.cloudinary.com/dnoubiojc/image/upload/v1735048587/staff.jpg"),
+    ("user", UserRole.USER, "https://res.cloudinary.com/dnoubiojc/image/upload/v1735048551/user.png"),
+]
+
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]
+FIRST_NAMES = ["An", "Bình", "Chi", "Dũng", "Giang", "Hà", "Hải", "Hùng", "Lan", "Linh", "Minh", "Nam", "Ngọc",
+               "Phong", "Quân", "Sơn", "Thảo", "Trang", "Tuấn", "Vy"]
+
+
+def seat_codes(prefix, size):
+    # Cùng cách đánh mã ghế với Airplane.generate_seats: 6 ghế (A-F) mỗi hàng
+    return [f"{prefix}{i // 6 + 1}{'ABCDEF'[i % 6]}" for i in range(size)]
+
+
+class Seeder:
+    # Sinh dữ liệu giả lập theo quy mô, cùng seed cho cùng dữ liệu.
+    # Mọi id được gán sẵn để ghi bằng bulk insert theo lô, không cần đọc lại id từ CSDL.
+    def __init__(self, provinces=10, airports_per_province=1, routes=8, flights_per_route=1, days=30,
+                 past_days=0, fill=0.3, users=100, seed=1, chunk_size=None, echo=None):
+        if not 0 <= fill <= 1:
+            raise ValueError("Tỉ lệ ghế đã bán phải nằm trong khoảng 0..1.")
+        if provinces < 2:
+            raise ValueError("Cần ít nhất 2 tỉnh để tạo tuyến bay.")
+
+        self.provinces = provinces
+        self.airports_per_province = max(airports_per_province, 1)
+        self.routes = routes
+        self.flights_per_route = max(flights_per_route, 1)
+        self.days = days
+        self.past_days = past_days
+        self.fill = fill
+        self.users = users
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size or app.config["SEED_CHUNK_SIZE"]
+        self.echo = echo or (lambda message: None)
+        self.counts = {}
+        self.next_id = {}
+
+    def _ids(self, model, n):
+        start = self.next_id.get(model, 1)
+        self.next_id[model] = start + n
+        return range(start, start + n)
+
+    def _write(self, model, rows):
+        # Ghi theo từng lô chunk_size dòng (executemany)
+        connection = db.session.connection()
+        for i in range(0, len(rows), self.chunk_size):
+            connection.execute(insert(model.__table__), rows[i:i + self.chunk_size])
+        self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+
+    def run(self):
+        started = timer.perf_counter()
+        self.seed_reference()
+        db.session.commit()
+
+        first_day = date.today() - timedelta(days=self.past_days)
+        for d in range(self.past_days + self.days):
+            self.seed_day(first_day + timedelta(days=d))
+            db.session.commit()
+            self.echo(f"{first_day + timedelta(days=d)}: {self.counts.get('seat_assignment', 0)} ghế, "
+                      f"{self.counts.get('ticket', 0)} vé")
+
+        # Dữ liệu dẫn xuất: bảng tìm kiếm và doanh thu gộp
+        read_model.refresh(db.session.connection())
+        db.session.commit()
+        dao.rebuild_revenue_rollup()
+        if seatmap.is_enabled():
+            seatmap.rebuild_all()
+
+        policy.invalidate()
+        reference.invalidate()
+        search_cache.flights.clear()
+        search_cache.calendars.clear()
+        self.counts['seconds'] = round(timer.perf_counter() - started, 1)
+        return self.counts
+
+    def seed_reference(self):
+        rng = self.rng
+        password = str(hashlib.md5("123456".encode('utf-8')).hexdigest())
+
+        users = [{'id': i, 'name': name, 'username': name, 'password': password, 'avatar': avatar,
+                  'active': True, 'user_role': role}
+                 for i, (name, role, avatar) in zip(self._ids(User, len(ACCOUNTS)), ACCOUNTS)]
+        users += [{'id': i, 'name': f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}", 'username': f"user{i:06d}",
+                   'password': password, 'avatar': None, 'active': True, 'user_role': UserRole.USER}
+                  for i in self._ids(User, self.users)]
+        self._write(User, users)
+        self.user_ids = [u['id'] for u in users if u['user_role'] == UserRole.USER]
+
+        provinces = [{'id': i, 'name': PROVINCES[i - 1] if i <= len(PROVINCES) else f"Tỉnh {i}"}
+                     for i in self._ids(Province, self.provinces)]
+        self._write(Province, provinces)
+
+        airports = []
+        for p in provinces:
+            for k in range(self.airports_per_province):
+                airport_id = self._ids(Airport, 1)[0]
+                if k == 0 and p['id'] <= len(AIRPORTS):
+                    airports.append(dict(AIRPORTS[p['id'] - 1], id=airport_id, province_id=p['id']))
+                else:
+                    airports.append({'id': airport_id, 'name': f"Sân bay {p['name']} {k + 1}",
+                                     'add': f"Địa chỉ sân bay {airport_id}", 'province_id': p['id']})
+        self._write(Airport, airports)
+
+        self._write(Policy, [{
+            'id': 1, 'number_airport': len(airports), 'minimun_flight_time': 30, 'max_inter_airport': 2,
+            'minimum_stop_time': 20, 'maximum_stop_time': 30, 'number_ticket_class': 2, 'ticket_price': 1000000,
+            'ticket_sell_time': 4, 'ticket_booking_time': 12,
+        }])
+
+        airplanes = [dict(a, id=i) for i, a in zip(self._ids(Airplane, len(AIRPLANES)), AIRPLANES)]
+        self._write(Airplane, airplanes)
+        seats, self.airplane_seats = [], {}
+        for a in airplanes:
+            layout = [(TicketClass.Business_Class, code) for code in seat_codes('B', a['business_class_seat_size'])] + \
+                     [(TicketClass.Economy_Class, code) for code in seat_codes('E', a['economy_class_seat_size'])]
+            ids = self._ids(Seat, len(layout))
+            seats += [{'id': i, 'seat_code': code, 'seat_class': seat_class, 'airplane_id': a['id']}
+                      for i, (seat_class, code) in zip(ids, layout)]
+            self.airplane_seats[a['id']] = [(i, seat_class) for i, (seat_class, code) in zip(ids, layout)]
+        self._write(Seat, seats)
+        self.airplanes = {a['id']: a for a in airplanes}
+
+        # Tuyến bay giữa hai sân bay khác tỉnh, chọn ngẫu nhiên
+        pairs = [(a['id'], b['id']) for a in airports for b in airports if a['province_id'] != b['province_id']]
+        chosen = rng.sample(pairs, min(self.routes, len(pairs)))
+        routes = [{'id': i, 'dep_airport_id': dep, 'des_airport_id': des}
+                  for i, (dep, des) in zip(self._ids(FlightRoute, len(chosen)), chosen)]
+        self._write(FlightRoute, routes)
+
+        # Mỗi chuyến bay có giờ khởi hành, thời gian bay và giá cố định cho mọi ngày
+        self.flights, intermediates = [], []
+        airport_ids = [a['id'] for a in airports]
+        for route in routes:
+            for flight_id in self._ids(Flight, self.flights_per_route):
+                airplane = rng.choice(airplanes)
+                economy_price = rng.randrange(800000, 3500001, 100000)
+                self.flights.append({
+                    'id': flight_id, 'route_id': route['id'], 'airplane_id': airplane['id'],
+                    'code': f"{FLIGHT_CODE_PREFIX[airplane['airplane_type']]}{100 + flight_id}",
+                    'clock': time(rng.randrange(5, 22), rng.choice((0, 15, 30, 45))),
+                    'flight_time': rng.randrange(60, 181, 5),
+                    'economy_price': economy_price,
+                    'business_price': economy_price + rng.randrange(300000, 1500001, 100000),
+                })
+                # Khoảng 1/5 chuyến bay có một sân bay trung gian
+                stops = [i for i in airport_ids if i not in (route['dep_airport_id'], route['des_airport_id'])]
+                if stops and rng.random() < 0.2:
+                    intermediates.append({'airport_id': rng.choice(stops), 'flight_id': flight_id,
+                                          'stop_time': rng.randrange(20, 31, 5), 'note': "Dừng đón khách"})
+        self._write(Flight, [{'id': f['id'], 'flight_code': f['code'], 'flight_route_id': f['route_id'],
+                              'airplane_id': f['airplane_id']} for f in self.flights])
+        self._write(IntermediateAirport, intermediates)
+
+    def seed_day(self, day):
+        rng = self.rng
+        now = datetime.now()
+        schedules, assignments, customers, receipts, details, tickets = [], [], [], [], [], []
+
+        for flight in self.flights:
+            schedule_id = self._ids(FlightSchedule, 1)[0]
+            dep_time = datetime.combine(day, flight['clock'])
+            seats = self.airplane_seats[flight['airplane_id']]
+            sold = {TicketClass.Business_Class: [], TicketClass.Economy_Class: []}
+
+            for seat_id, seat_class in seats:
+                assignment_id = self._ids(SeatAssignment, 1)[0]
+                is_sold = rng.random() < self.fill
+                assignments.append({'id': assignment_id, 'is_available': not is_sold,
+                                    'flight_schedule_id': schedule_id, 'seat_id': seat_id})
+                if is_sold:
+                    sold[seat_class].append(assignment_id)
+
+            airplane = self.airplanes[flight['airplane_id']]
+            schedules.append({
+                'id': schedule_id, 'flight_id': flight['id'], 'dep_time': dep_time,
+                'flight_time': flight['flight_time'],
+                'business_class_seat_size': airplane['business_class_seat_size'],
+                'economy_class_seat_size': airplane['economy_class_seat_size'],
+                'business_class_price': flight['business_price'], 'economy_class_price': flight['economy_price'],
+                'remaining_business_seats': airplane['business_class_seat_size'] - len(sold[TicketClass.Business_Class]),
+                'remaining_economy_seats': airplane['economy_class_seat_size'] - len(sold[TicketClass.Economy_Class]),
+            })
+
+            # Ghế đã bán được gom thành các hóa đơn 1-4 vé, lập trong 60 ngày trước giờ bay
+            for seat_class, assignment_ids in sold.items():
+                unit_price = flight['business_price'] if seat_class == TicketClass.Business_Class \
+                    else flight['economy_price']
+                while assignment_ids:
+                    size = rng.randint(1, 4)
+                    group, assignment_ids = assignment_ids[:size], assignment_ids[size:]
+                    receipt_id = self._ids(Receipt, 1)[0]
+                    user_id = rng.choice(self.user_ids)
+                    created = min(dep_time - timedelta(minutes=rng.randrange(12 * 60, 60 * 24 * 60)),
+                                  now - timedelta(minutes=1))
+                    receipts.append({'id': receipt_id, 'user_id': user_id, 'total': unit_price * len(group),
+                                     'method': rng.choice((Method.Bank, Method.Momo)), 'created_date': created})
+                    details.append({'id': receipt_id, 'quantity': len(group), 'unit_price': unit_price,
+                                    'receipt_id': receipt_id, 'flight_route_id': flight['route_id']})
+                    for assignment_id in group:
+                        customer_id = self._ids(Customer, 1)[0]
+                        customers.append({
+                            'id': customer_id, 'last_name': rng.choice(LAST_NAMES), 'name': rng.choice(FIRST_NAMES),
+                            'gender': rng.choice((Gender.Mr, Gender.Ms)),
+                            'birthday': date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 60)),
+                        })
+                        tickets.append({'id': customer_id, 'date_created': created,
+                                        'seat_assignment_id': assignment_id, 'user_id': user_id,
+                                        'customer_id': customer_id, 'ticket_class': seat_class})
+
+        self._write(FlightSchedule, schedules)
+        self._write(SeatAssignment, assignments)
+        self._write(Customer, customers)
+        self._write(Receipt, receipts)
+        self._write(ReceiptDetail, details)
+        self._write(Ticket, tickets)
+
+
+@app.cli.command("seed")
+@click.option("--provinces", type=int, default=10, show_default=True)
+@click.option("--airports-per-province", type=int, default=1, show_default=True)
+@click.option("--routes", type=int, default=8, show_default=True, help="Số tuyến bay.")
+@click.option("--flights-per-route", type=int, default=1, show_default=True)
+@click.option("--days", type=int, default=30, show_default=True, help="Số ngày có lịch bay tính từ hôm nay.")
+@click.option("--past-days", type=int, default=0, show_default=True, help="Số ngày có lịch bay trước hôm nay.")
+@click.option("--fill", type=float, default=0.3, show_default=True, help="Tỉ lệ ghế đã bán (0..1).")
+@click.option("--users", type=int, default=100, show_default=True, help="Số tài khoản khách hàng sinh thêm.")
+@click.option("--seed", "seed_value", type=int, default=1, show_default=True, help="Cùng seed cho cùng dữ liệu.")
+@click.option("--chunk-size", type=int, help="Số dòng mỗi lệnh insert.")
+@click.option("--drop", is_flag=True, help="Xóa và tạo lại toàn bộ bảng trước khi sinh dữ liệu.")
+def seed_command(provinces, airports_per_province, routes, flights_per_route, days, past_days, fill, users,
+                 seed_value, chunk_size, drop):
+    """Sinh dữ liệu giả lập theo quy mô (tài khoản admin/staff/user, mật khẩu 123456)."""
+    if drop:
+        db.drop_all()
+    db.create_all()
+    if db.session.query(Policy.id).first() is not None:
+        raise click.ClickException("CSDL đã có dữ liệu, dùng --drop để tạo lại.")
+
+    try:
+        seeder = Seeder(provinces, airports_per_province, routes, flights_per_route, days, past_days, fill, users,
+                        seed_value, chunk_size, echo=click.echo)
+    except ValueError as ex:
+        raise click.BadParameter(str(ex))
+    counts = seeder.run()
+    click.echo(", ".join(f"{table}: {n}" for table, n in counts.items()))
@@ -0,0 +1,35 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime
+
+
+class add_minutes(FunctionElement):
+    # add_minutes(thời điểm, số phút): biên dịch riêng cho từng hệ CSDL thay vì DATE_ADD(... INTERVAL ...) của MySQL
+    type = DateTime()
+    name = 'add_minutes'
+    inherit_cache = True
+
+
+@compiles(add_minutes)
+def _add_minutes_default(element, compiler, **kw):
+    # SQL chuẩn
+    moment, minutes = [compiler.process(arg, **kw) for arg in element.clauses]
+    return f"({moment} + {minutes} * INTERVAL '1' MINUTE)"
+
+
+@compiles(add_minutes, 'mysql')
+def _add_minutes_mysql(element, compiler, **kw):
+    moment, minutes = [compiler.process(arg, **kw) for arg in element.clauses]
+    return f"DATE_ADD({moment}, INTERVAL {minutes} MINUTE)"
+
+
+@compiles(add_minutes, 'sqlite')
+def _add_minutes_sqlite(element, compiler, **kw):
+    moment, minutes = [compiler.process(arg, **kw) for arg in element.clauses]
+    return f"datetime({moment}, '+' || ({minutes}) || ' minutes')"
+
+
+@compiles(add_minutes, 'postgresql')
+def _add_minutes_postgresql(element, compiler, **kw):
+    moment, minutes = [compiler.process(arg, **kw) for arg in element.clauses]
+    return f"({moment} + make_interval(mins => {minutes}))"
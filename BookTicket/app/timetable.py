@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+import os
+import click
+from datetime import datetime
+from sqlalchemy import insert, tuple_
+from app import app, db, dao, search_cache
+from app.models import Airport, Flight, FlightSchedule, IntermediateAirport, TicketClass
+
+# Các cột của file lịch bay (CSV có dòng tiêu đề, NDJSON mỗi dòng một object cùng khóa)
+COLUMNS = [
+    'flight_code', 'dep_airport', 'des_airport', 'dep_time', 'flight_time',
+    'business_class_seat_size', 'economy_class_seat_size', 'business_class_price', 'economy_class_price',
+    'intermediate_airport_1', 'stop_time_1', 'note_1', 'intermediate_airport_2', 'stop_time_2', 'note_2'
+]
+
+
+def guess_format(filename):
+    return 'ndjson' if os.path.splitext(filename or '')[1].lower() in ('.json', '.jsonl', '.ndjson') else 'csv'
+
+
+def read_rows(stream, fmt):
+    # Đọc lần lượt từng dòng, trả về (số dòng, dict) hoặc (số dòng, lỗi) nếu dòng không đọc được
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as ex:
+                yield line_no, ValueError(f"JSON không hợp lệ: {ex}")
+
+
+class TimetableImport:
+    # Nhập lịch bay theo lô: mỗi lô một giao dịch, dòng lỗi được báo qua on_error(số dòng, thông báo)
+    def __init__(self, on_error, batch_size=None):
+        self.on_error = on_error
+        self.batch_size = batch_size or app.config["TIMETABLE_BATCH_SIZE"]
+        self.policy = dao.get_latest_policy()
+        self.airports = {i for (i,) in db.session.query(Airport.id).all()}
+        self.flights = {}  # (mã chuyến bay, sân bay đi, sân bay đến) -> flight_id
+        self.airplanes = {}  # flight_id -> (máy bay, số ghế thực có theo hạng)
+        self.inter_airports = {}  # flight_id -> các sân bay trung gian đã có
+        self.created = 0
+        self.failed = 0
+
+    def run(self, rows):
+        batch = []
+        for line, row in rows:
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        return self.created, self.failed
+
+    def _error(self, line, message):
+        self.failed += 1
+        self.on_error(line, message)
+
+    def _flight_id(self, flight_code, dep_airport, des_airport):
+        key = (flight_code, dep_airport, des_airport)
+        if key not in self.flights:
+            row = dao.get_flight_by_code_and_airports(*key)
+            self.flights[key] = row[0] if row else None
+        return self.flights[key]
+
+    def _airplane(self, flight_id):
+        if flight_id not in self.airplanes:
+            airplane = db.session.get(Flight, flight_id).airplane
+            self.airplanes[flight_id] = (airplane, dao.seat_counts(airplane.id) if airplane else {})
+        return self.airplanes[flight_id]
+
+    def _existing_inter_airports(self, flight_id):
+        if flight_id not in self.inter_airports:
+            self.inter_airports[flight_id] = {i for (i,) in db.session.query(IntermediateAirport.airport_id).filter(
+                IntermediateAirport.flight_id == flight_id).all()}
+        return self.inter_airports[flight_id]
+
+    def _parse(self, row):
+        flight_id = self._flight_id(str(row['flight_code']).strip(), int(row['dep_airport']), int(row['des_airport']))
+        if flight_id is None:
+            raise ValueError("Không tìm thấy chuyến bay.")
+
+        dep_time = datetime.strptime(str(row['dep_time']).strip(), "%Y-%m-%d %H:%M")
+        if dep_time < datetime.now():
+            raise ValueError("Ngày khởi hành không thể bằng hoặc nhỏ hơn ngày hiện tại!")
+
+        schedule = {
+            'flight_id': flight_id,
+            'dep_time': dep_time,
+            'flight_time': int(row['flight_time']),
+            'business_class_seat_size': int(row['business_class_seat_size']),
+            'economy_class_seat_size': int(row['economy_class_seat_size']),
+            'business_class_price': int(row['business_class_price']),
+            'economy_class_price': int(row['economy_class_price']),
+        }
+
+        # Cùng các kiểm tra như FlightSchedule.__init__
+        airplane, counts = self._airplane(flight_id)
+        FlightSchedule.validate(airplane, self.policy, schedule['flight_time'],
+                                schedule['business_class_seat_size'], schedule['economy_class_seat_size'],
+                                schedule['business_class_price'], schedule['economy_class_price'])
+        schedule['remaining_business_seats'] = min(schedule['business_class_seat_size'],
+                                                   counts.get(TicketClass.Business_Class, 0))
+        schedule['remaining_economy_seats'] = min(schedule['economy_class_seat_size'],
+                                                  counts.get(TicketClass.Economy_Class, 0))
+
+        stops = []
+        for i in (1, 2):
+            if not row.get(f'intermediate_airport_{i}'):
+                continue
+            airport_id = int(row[f'intermediate_airport_{i}'])
+            if airport_id not in self.airports:
+                raise ValueError(f"Không tìm thấy sân bay trung gian {airport_id}.")
+            stops.append({
+                'flight_id': flight_id,
+                'airport_id': airport_id,
+                'stop_time': int(row.get(f'stop_time_{i}') or 20),
+                'note': row.get(f'note_{i}') or None
+            })
+
+        return schedule, stops
+
+    def _new_stops(self, stops):
+        # Sân bay trung gian gắn với chuyến bay: bỏ qua nếu đã có, kiểm tra như IntermediateAirport.__init__
+        new_stops = []
+        for stop in stops:
+            existing = self._existing_inter_airports(stop['flight_id'])
+            if stop['airport_id'] in existing:
+                continue
+            IntermediateAirport.validate(self.policy, len(existing), stop['stop_time'])
+            existing.add(stop['airport_id'])
+            new_stops.append(stop)
+        return new_stops
+
+    def _write_batch(self, batch):
+        parsed = []
+        for line, row in batch:
+            if isinstance(row, Exception):
+                self._error(line, str(row))
+                continue
+            try:
+                parsed.append((line, *self._parse(row)))
+            except (KeyError, TypeError, ValueError) as ex:
+                self._error(line, f"Thiếu cột {ex}" if isinstance(ex, KeyError) else str(ex))
+
+        if not parsed:
+            return
+
+        # Lịch bị trùng: một truy vấn cho cả lô
+        existing = set(db.session.query(FlightSchedule.flight_id, FlightSchedule.dep_time).filter(
+            tuple_(FlightSchedule.flight_id, FlightSchedule.dep_time).in_(
+                [(s['flight_id'], s['dep_time']) for _, s, _ in parsed]
+            )
+        ).all())
+
+        lines, schedules, stops = [], [], []
+        for line, schedule, schedule_stops in parsed:
+            key = (schedule['flight_id'], schedule['dep_time'])
+            if key in existing:
+                self._error(line, "Chuyến bay này đã được lập lịch với thời gian này rồi.")
+                continue
+            try:
+                schedule_stops = self._new_stops(schedule_stops)
+            except ValueError as ex:
+                self._error(line, str(ex))
+                continue
+            existing.add(key)
+            lines.append(line)
+            schedules.append(schedule)
+            stops += schedule_stops
+
+        if not schedules:
+            return
+
+        try:
+            connection = db.session.connection()
+            if stops:
+                connection.execute(insert(IntermediateAirport), stops)
+            schedule_ids, routes = dao.bulk_create_schedules(connection, schedules,
+                                                             refresh_flight_ids={s['flight_id'] for s in stops})
+            db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            self.inter_airports.clear()
+            for line in lines:
+                self._error(line, f"Lỗi khi ghi dữ liệu: {ex}")
+            return
+
+        self.created += len(schedule_ids)
+        for departure, destination in routes:
+            search_cache.invalidate_route(departure, destination)
+
+
+def import_stream(stream, fmt, on_error, batch_size=None):
+    return TimetableImport(on_error, batch_size).run(read_rows(stream, fmt))
+
+
+def import_upload(file_storage, on_error, batch_size=None):
+    # File tải lên qua admin: đọc trực tiếp từ stream, không nạp toàn bộ vào bộ nhớ
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    return import_stream(stream, guess_format(file_storage.filename), on_error, batch_size)
+
+
+@app.cli.command("timetable-import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(['csv', 'ndjson']), help="Mặc định đoán theo đuôi file.")
+@click.option("--batch-size", type=int, help="Số dòng mỗi giao dịch.")
+@click.option("--report", type=click.File('w', encoding='utf-8'), help="Ghi các dòng lỗi ra file CSV.")
+def import_command(path, fmt, batch_size, report):
+    """Nhập lịch bay và sân bay trung gian từ file CSV/NDJSON."""
+    writer = csv.writer(report) if report else None
+    if writer:
+        writer.writerow(['line', 'error'])
+
+    def on_error(line, message):
+        if writer:
+            writer.writerow([line, message])
+        else:
+            click.echo(f"Dòng {line}: {message}", err=True)
+
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        created, failed = import_stream(stream, fmt or guess_format(path), on_error, batch_size)
+    click.echo(f"Đã tạo {created} lịch bay, {failed} dòng lỗi.")
@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import click
+import cloudinary.uploader
+from concurrent.futures import ThreadPoolExecutor
+from app import app, db
+from app.models import User
+
+
+# Nơi lưu ảnh đại diện: nhận đường dẫn file ảnh, trả về URL công khai
+def cloudinary_storage(path):
+    return cloudinary.uploader.upload(path).get("secure_url")
+
+
+def local_storage(path):
+    # Dùng khi phát triển/kiểm thử: chép vào static/avatars thay vì tải lên Cloudinary
+    directory = os.path.join(app.static_folder, 'avatars')
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.basename(path)
+    shutil.copyfile(path, os.path.join(directory, name))
+    return f"{app.static_url_path}/avatars/{name}"
+
+
+# Có thể đăng ký thêm backend rồi chọn bằng AVATAR_STORAGE
+STORAGE_BACKENDS = {
+    'cloudinary': cloudinary_storage,
+    'local': local_storage,
+}
+
+# Đuôi file được nhận và mimetype tương ứng. File trong static/avatars được phục vụ từ chính domain của ứng dụng,
+# nên không nhận .html, .svg... (XSS)
+IMAGE_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
+# Vài byte đầu của từng định dạng ảnh
+IMAGE_SIGNATURES = {
+    'image/jpeg': (b'\xff\xd8\xff',),
+    'image/png': (b'\x89PNG\r\n\x1a\n',),
+    'image/gif': (b'GIF87a', b'GIF89a'),
+    'image/webp': (b'RIFF',),
+}
+
+_lock = threading.Lock()
+_state = {'executor': None}
+
+
+def spool_dir():
+    directory = app.config.get("AVATAR_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), 'bookticket_avatars')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _executor():
+    with _lock:
+        if _state['executor'] is None:
+            _state['executor'] = ThreadPoolExecutor(max_workers=app.config["AVATAR_UPLOAD_WORKERS"],
+                                                    thread_name_prefix='avatar-upload')
+        return _state['executor']
+
+
+def image_extension(file_storage):
+    # Đuôi file nếu là ảnh hợp lệ (đuôi, mimetype và nội dung khớp nhau), ngược lại ValueError
+    ext = os.path.splitext(file_storage.filename or '')[1].lower()
+    mimetype = IMAGE_TYPES.get(ext)
+    if mimetype is None or file_storage.mimetype != mimetype:
+        raise ValueError(f"Ảnh đại diện phải là một trong: {', '.join(IMAGE_TYPES)}.")
+
+    header = file_storage.stream.read(12)
+    file_storage.stream.seek(0)
+    if not header.startswith(IMAGE_SIGNATURES[mimetype]) or (mimetype == 'image/webp' and header[8:12] != b'WEBP'):
+        raise ValueError("Nội dung file không phải ảnh hợp lệ.")
+    return ext
+
+
+def submit(user_id, file_storage):
+    # Ghi ảnh và thông tin công việc xuống thư mục spool (không mất khi tiến trình khởi động lại),
+    # sau đó tải lên ở luồng nền
+    ext = image_extension(file_storage)
+    job_id = uuid.uuid4().hex
+    image = os.path.join(spool_dir(), job_id + ext)
+    file_storage.save(image)
+
+    # Ghi ra file tạm rồi đổi tên: `flask avatar-uploads` không bao giờ đọc phải file .json ghi dở
+    with open(os.path.join(spool_dir(), job_id + '.tmp'), 'w') as f:
+        json.dump({'user_id': user_id, 'image': image}, f)
+    os.replace(os.path.join(spool_dir(), job_id + '.tmp'), os.path.join(spool_dir(), job_id + '.json'))
+
+    _executor().submit(run_job, job_id).add_done_callback(_log_failure)
+    return job_id
+
+
+def _log_failure(future):
+    ex = future.exception()
+    if ex is not None:
+        app.logger.error("Công việc tải ảnh đại diện bị lỗi: %s", ex, exc_info=ex)
+
+
+def pending_jobs():
+    return sorted(name[:-5] for name in os.listdir(spool_dir()) if name.endswith('.json'))
+
+
+def claim(job_id):
+    # Nhận công việc bằng cách đổi tên .json -> .running (nguyên tử): chỉ một luồng/tiến trình chạy được mỗi công việc.
+    # Trả về đường dẫn file .running, None nếu công việc đã được nhận hoặc đã xong
+    job_file = os.path.join(spool_dir(), job_id + '.json')
+    running = os.path.join(spool_dir(), job_id + '.running')
+    try:
+        os.rename(job_file, running)
+    except FileNotFoundError:
+        return None
+    os.utime(running)  # thời điểm nhận, dùng để phát hiện công việc bị bỏ dở
+    return running
+
+
+def release(job_id):
+    # Trả công việc về spool để chạy lại sau
+    os.replace(os.path.join(spool_dir(), job_id + '.running'), os.path.join(spool_dir(), job_id + '.json'))
+
+
+def requeue_stale(seconds):
+    # Công việc được nhận quá lâu mà chưa xong (tiến trình chạy nó đã dừng) được trả về spool
+    requeued = 0
+    for name in os.listdir(spool_dir()):
+        path = os.path.join(spool_dir(), name)
+        if name.endswith('.running') and time.time() - os.path.getmtime(path) > seconds:
+            try:
+                release(name[:-8])
+                requeued += 1
+            except FileNotFoundError:
+                pass
+    return requeued
+
+
+def run_job(job_id):
+    running = claim(job_id)
+    if running is None:
+        return None
+
+    try:
+        with open(running) as f:
+            job = json.load(f)
+
+        storage = STORAGE_BACKENDS[app.config["AVATAR_STORAGE"]]
+        retries = app.config["AVATAR_UPLOAD_RETRIES"]
+        for attempt in range(retries + 1):
+            try:
+                url = storage(job['image'])
+                break
+            except Exception as ex:
+                if attempt == retries:
+                    # Giữ lại công việc trong spool để chạy lại bằng `flask avatar-uploads`
+                    app.logger.warning("Tải ảnh đại diện của user %s thất bại: %s", job['user_id'], ex)
+                    release(job_id)
+                    return None
+                time.sleep(app.config["AVATAR_UPLOAD_BACKOFF"] * 2 ** attempt)
+
+        with app.app_context():
+            user = db.session.get(User, job['user_id'])
+            if user is not None:
+                user.avatar = url
+                db.session.commit()
+    except Exception:
+        release(job_id)
+        raise
+
+    os.remove(job['image'])
+    os.remove(running)
+    return url
+
+
+@app.cli.command("avatar-uploads")
+def avatar_uploads_command():
+    """Chạy lại các công việc tải ảnh đại diện còn nằm trong spool."""
+    requeued = requeue_stale(app.config["AVATAR_JOB_STALE_SECONDS"])
+    if requeued:
+        click.echo(f"Trả lại {requeued} công việc bị bỏ dở.")
+    jobs = pending_jobs()
+    done = 0
+    for job_id in jobs:
+        # Công việc đang được luồng nền chạy (đã nhận) thì bỏ qua; lỗi của một công việc không dừng các công việc khác
+        try:
+            done += 1 if run_job(job_id) else 0
+        except Exception as ex:
+            click.echo(f"Công việc {job_id} bị lỗi: {ex}", err=True)
+    click.echo(f"Đã tải lên {done}/{len(jobs)} ảnh đại diện.")
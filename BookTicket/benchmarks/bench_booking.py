@@ -0,0 +1,31 @@
+from app import db, dao
+from app.models import FlightSchedule, TicketClass
+
+
+def _booking_form(schedule, seat_code):
+    return {
+        'passenger_count': 1, 'flight_id': schedule.flight_id, 'flight_schedule_id': schedule.id,
+        'ticket_class': 'Economy Class', 'total': '1.500.000', 'payment_method': 'bank',
+        'departure_date': schedule.dep_time.strftime('%d/%m/%Y'), 'departure_time': schedule.dep_time.strftime('%H:%M'),
+        'arrival_time': '', 'passenger_name_0': 'Nguyen Van A', 'passenger_birth_0': '1990-01-01',
+        'passenger_gender_0': 'Male', 'seat_0': seat_code,
+    }
+
+
+def bench_add_data(benchmark, client, ctx):
+    # Toàn bộ luồng đặt vé (POST /add_data), mỗi vòng đặt một ghế còn trống khác
+    schedules = FlightSchedule.query.order_by(FlightSchedule.id.desc()).limit(20).all()
+    forms = [_booking_form(s, seat.seat_code) for s in schedules
+             for seat in dao.get_available_seats(s.id, TicketClass.Economy_Class)]
+    db.session.rollback()
+    rounds = min(len(forms), 100)
+
+    def next_seat():
+        return (), {'data': forms.pop(), 'headers': {'Referer': '/booking'}}
+
+    def book(data, headers):
+        response = client.post('/add_data', data=data, headers=headers)
+        assert response.status_code == 200
+        return response
+
+    benchmark.pedantic(book, setup=next_seat, rounds=rounds)
@@ -0,0 +1,9 @@
+from app import dao
+
+
+def bench_revenue_stats(benchmark, ctx):
+    benchmark(dao.revenue_stats)
+
+
+def bench_revenue_month(benchmark, ctx):
+    benchmark(dao.revenue_month)
@@ -0,0 +1,19 @@
+import itertools
+from datetime import date, datetime, time, timedelta
+from app import db, dao
+from app.models import Flight
+
+_windows = itertools.count()
+
+
+def bench_create_recurring_schedules(benchmark, ctx):
+    # Mỗi vòng tạo 30 lịch bay trong một khoảng thời gian chưa có lịch (sau các lịch đã seed)
+    airplane = db.session.get(Flight, 1).airplane
+    sizes = airplane.business_class_seat_size, airplane.economy_class_seat_size
+
+    def next_window():
+        start = date.today() + timedelta(days=400 + 31 * next(_windows))
+        dep_times = [datetime.combine(start + timedelta(days=i), time(5, 15)) for i in range(30)]
+        return (1, dep_times, 120, *sizes, 1800000, 1500000), {}
+
+    benchmark.pedantic(dao.create_recurring_schedules, setup=next_window, rounds=10)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app import db, dao, search_cache
+from app.models import FlightSearch
+
+
+def _route():
+    # Tuyến và ngày của chuyến bay sắp khởi hành đầu tiên trong dữ liệu seed
+    f = db.session.query(FlightSearch).filter(FlightSearch.dep_time > datetime.now()).order_by(
+        FlightSearch.flight_schedule_id).first()
+    return f.dep_province, f.des_province, f.dep_time.strftime('%Y-%m-%d')
+
+
+def bench_load_flights_uncached(benchmark, ctx):
+    args = _route()
+    benchmark.pedantic(dao.load_flights, args=args, setup=search_cache.flights.clear, rounds=50, warmup_rounds=2)
+
+
+def bench_load_flights_cached(benchmark, ctx):
+    args = _route()
+    dao.load_flights(*args)
+    benchmark(dao.load_flights, *args)
+
+
+def bench_fare_calendar_uncached(benchmark, ctx):
+    dep, des, day = _route()
+    benchmark.pedantic(dao.load_fare_calendar, args=(dep, des, day, 15), setup=search_cache.calendars.clear,
+                       rounds=50, warmup_rounds=2)
@@ -0,0 +1,7 @@
+from app import dao
+from app.models import FlightSchedule, TicketClass
+
+
+def bench_get_available_seats(benchmark, ctx):
+    schedule_id = FlightSchedule.query.order_by(FlightSchedule.id.desc()).first().id
+    benchmark(dao.get_available_seats, schedule_id, TicketClass.Economy_Class)
@@ -0,0 +1,117 @@
+# Bộ benchmark cho các đường xử lý chính của DAO, chạy trên SQLite (mặc định) hoặc CSDL đặt qua BENCH_DATABASE_URL:
+#   cd BookTicket/benchmarks && pip install -r requirements.txt && pytest
+#   BENCH_SCALES=small,medium,large pytest          # các mức dữ liệu cần đo
+#   pytest --benchmark-compare                       # so với lần chạy trước trong .benchmarks/
+#   pytest test_explain.py                           # chỉ kiểm tra truy vấn không quét toàn bộ bảng
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'app')]  # index.py dùng `import dao`
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or \
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "bookticket_bench.db")
+
+from app import app, db, dao
+from app.seed import Seeder
+from app.models import FlightSearch, TicketClass
+import index
+
+# Tham số của Seeder (flask seed) cho từng mức dữ liệu
+SCALES = {
+    'small': {'provinces': 5, 'routes': 10, 'flights_per_route': 1, 'days': 7, 'past_days': 7, 'fill': 0.2},
+    'medium': {'provinces': 10, 'routes': 60, 'flights_per_route': 2, 'days': 30, 'past_days': 30, 'fill': 0.3},
+    'large': {'provinces': 30, 'routes': 300, 'flights_per_route': 2, 'days': 60, 'past_days': 120, 'fill': 0.5},
+}
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [s.strip() for s in os.environ.get('BENCH_SCALES', 'small,medium').split(',') if s.strip()]
+        metafunc.parametrize('scale', scales, scope='session')
+
+
+@pytest.fixture(scope='session')
+def seeded(scale):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        Seeder(**SCALES[scale]).run()
+    return scale
+
+
+@pytest.fixture
+def ctx(seeded):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+@pytest.fixture
+def client(seeded):
+    c = app.test_client()
+    c.post('/login', data={'username': 'staff', 'password': '123456'})
+    return c
+
+
+@pytest.fixture
+def login(seeded):
+    # Mỗi test client là một phiên riêng (cookie, khóa giữ ghế); tài khoản seed dùng mật khẩu 123456
+    def login(username):
+        c = app.test_client()
+        c.post('/login', data={'username': username, 'password': '123456'})
+        return c
+    return login
+
+
+_used_schedules = set()
+
+
+@pytest.fixture
+def schedule(ctx):
+    # Lịch bay sắp khởi hành còn nhiều ghế phổ thông, mỗi test một lịch bay riêng để không ảnh hưởng lẫn nhau.
+    # Kết thúc giao dịch đọc ngay: SQLite không cho request khác ghi khi phiên của test còn giữ khóa đọc
+    row = db.session.query(FlightSearch.flight_schedule_id, FlightSearch.flight_id).filter(
+        FlightSearch.dep_time > datetime.now() + timedelta(days=1),
+        FlightSearch.remaining_economy_seats >= 10,
+        FlightSearch.flight_schedule_id.notin_(_used_schedules)
+    ).order_by(FlightSearch.flight_schedule_id).first()
+    db.session.rollback()
+    _used_schedules.add(row.flight_schedule_id)
+    return row
+
+
+@pytest.fixture
+def free_seats(ctx):
+    def free_seats(schedule):
+        seats = [s.seat_code for s in dao.get_available_seats(schedule.flight_schedule_id, TicketClass.Economy_Class)]
+        db.session.rollback()
+        return seats
+    return free_seats
+
+
+@pytest.fixture
+def book():
+    # Gửi form đặt vé hạng phổ thông (POST /add_data): 200 = thành công, 302 về trang trước kèm thông báo lỗi
+    def book(client, schedule, seat_codes):
+        form = {
+            'passenger_count': len(seat_codes), 'flight_id': schedule.flight_id,
+            'flight_schedule_id': schedule.flight_schedule_id, 'ticket_class': 'Economy Class',
+            'total': '1.500.000', 'payment_method': 'bank', 'departure_date': '', 'departure_time': '',
+            'arrival_time': '',
+        }
+        for i, seat_code in enumerate(seat_codes):
+            form.update({f'passenger_name_{i}': 'Nguyen Van A', f'passenger_birth_{i}': '1990-01-01',
+                         f'passenger_gender_{i}': 'Male', f'seat_{i}': seat_code})
+        return client.post('/add_data', data=form, headers={'Referer': '/booking'})
+    return book
+
+
+@pytest.fixture
+def flashes():
+    def flashes(client):
+        with client.session_transaction() as session:
+            return [message for _, message in session.get('_flashes', [])]
+    return flashes
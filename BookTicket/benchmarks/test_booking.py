@@ -0,0 +1,80 @@
+from datetime import date
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from app import db, dao
+from app.models import Ticket, SeatAssignment, Seat, TicketClass, Gender, Method, User
+
+
+def _tickets(schedule, seat_code):
+    count = db.session.query(func.count(Ticket.id)).join(
+        SeatAssignment, SeatAssignment.id == Ticket.seat_assignment_id
+    ).join(Seat, Seat.id == SeatAssignment.seat_id).filter(
+        SeatAssignment.flight_schedule_id == schedule.flight_schedule_id,
+        Seat.seat_code == seat_code
+    ).scalar()
+    db.session.rollback()
+    return count
+
+
+def _passengers(seat_codes):
+    return [{'name': 'A', 'last_name': 'Nguyen Van', 'gender': Gender.Mr, 'birthday': date(1990, 1, 1),
+             'seat_code': seat_code} for seat_code in seat_codes]
+
+
+def test_same_seat_is_sold_once(login, book, flashes, schedule, free_seats):
+    first, second = login('user'), login('user000004')
+    seat = free_seats(schedule)[0]
+
+    assert book(first, schedule, [seat]).status_code == 200
+    response = book(second, schedule, [seat])
+    assert response.status_code == 302 and response.headers['Location'].endswith('/booking')
+    assert any('không khả dụng' in message for message in flashes(second))
+
+    assert _tickets(schedule, seat) == 1
+    duplicated = db.session.query(Ticket.seat_assignment_id).group_by(Ticket.seat_assignment_id).having(
+        func.count(Ticket.id) > 1).count()
+    assert duplicated == 0
+    assert dao.reconcile_remaining_seats() == []
+
+
+def test_create_booking_retries_after_deadlock(ctx, monkeypatch, schedule, free_seats):
+    seat = free_seats(schedule)[0]
+    user_id = db.session.query(User.id).filter(User.username == 'user').scalar()
+    create_booking = dao._create_booking
+    calls = []
+
+    def deadlock_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            # Ghi một phần rồi gặp deadlock: phải được hoàn tác trước khi thử lại
+            create_booking(*args, **kwargs)
+            raise OperationalError('UPDATE seat_assignment', {}, Exception(1213, 'Deadlock found'))
+        return create_booking(*args, **kwargs)
+
+    monkeypatch.setattr(dao, '_create_booking', deadlock_once)
+    monkeypatch.setattr(dao.time, 'sleep', lambda seconds: None)
+    receipt = dao.create_booking(user_id, schedule.flight_schedule_id, TicketClass.Economy_Class,
+                                 _passengers([seat]), 1500000, Method.Bank)
+
+    assert receipt.id is not None and len(calls) == 2
+    assert _tickets(schedule, seat) == 1
+    assert dao.reconcile_remaining_seats() == []
+
+
+@pytest.mark.parametrize('code, attempts', [(1213, None), (2006, 1)])
+def test_create_booking_stops_retrying(ctx, monkeypatch, schedule, free_seats, code, attempts):
+    # Deadlock liên tục: thử lại BOOKING_MAX_RETRIES lần rồi báo lỗi; lỗi khác: báo lỗi ngay
+    seat = free_seats(schedule)[0]
+    calls = []
+
+    def fail(*args, **kwargs):
+        calls.append(args)
+        raise OperationalError('UPDATE seat_assignment', {}, Exception(code, 'error'))
+
+    monkeypatch.setattr(dao, '_create_booking', fail)
+    monkeypatch.setattr(dao.time, 'sleep', lambda seconds: None)
+    with pytest.raises(OperationalError):
+        dao.create_booking(1, schedule.flight_schedule_id, TicketClass.Economy_Class, _passengers([seat]),
+                           1500000, Method.Bank)
+    assert len(calls) == (attempts or dao.app.config["BOOKING_MAX_RETRIES"] + 1)
@@ -0,0 +1,8 @@
+from app import explain
+
+
+def test_hot_queries_use_indexes(ctx):
+    # Mỗi câu SELECT của các truy vấn DAO chính không được quét toàn bộ bảng (xem flask explain-check)
+    failures = [f"{name}: {', '.join(scans)}\n  {' '.join(statement.split())}"
+                for name, statement, scans in explain.check() if scans]
+    assert not failures, "Truy vấn quét toàn bộ bảng:\n" + "\n".join(failures)
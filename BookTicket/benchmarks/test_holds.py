@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from app import db, dao, holds
+from app.models import SeatHold, SeatAssignment, Seat, TicketClass
+
+
+def _hold(client, schedule, seat_codes):
+    return client.post('/api/seat-hold', json={'flight_schedule_id': schedule.flight_schedule_id,
+                                               'seat_class': 'Economy_Class', 'seats': seat_codes})
+
+
+def _held_codes(schedule):
+    codes = {code for (code,) in db.session.query(Seat.seat_code).join(SeatHold, SeatHold.seat_id == Seat.id).filter(
+        SeatHold.flight_schedule_id == schedule.flight_schedule_id,
+        SeatHold.expires_at > datetime.now()
+    ).all()}
+    db.session.rollback()
+    return codes
+
+
+def _is_sold(schedule, seat_code):
+    sold = db.session.query(SeatAssignment.is_available.is_(False)).join(Seat, Seat.id == SeatAssignment.seat_id).filter(
+        SeatAssignment.flight_schedule_id == schedule.flight_schedule_id,
+        Seat.seat_code == seat_code
+    ).scalar()
+    db.session.rollback()
+    return sold
+
+
+def _expire(schedule):
+    db.session.execute(update(SeatHold).where(
+        SeatHold.flight_schedule_id == schedule.flight_schedule_id
+    ).values(expires_at=datetime.now() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_held_seat_cannot_be_held_or_booked_by_another_session(login, book, flashes, schedule, free_seats):
+    holder, other = login('user'), login('user000004')
+    seat = free_seats(schedule)[0]
+    assert _hold(holder, schedule, [seat]).status_code == 200
+
+    assert _hold(other, schedule, [seat]).status_code == 409
+    response = book(other, schedule, [seat])
+    assert response.status_code == 302
+    assert any('không khả dụng' in message for message in flashes(other))
+    assert not _is_sold(schedule, seat)
+
+    assert book(holder, schedule, [seat]).status_code == 200
+    assert _is_sold(schedule, seat)
+
+
+def test_expired_hold_frees_its_seat(login, schedule, free_seats):
+    holder, other = login('user'), login('user000004')
+    seat = free_seats(schedule)[0]
+    assert _hold(holder, schedule, [seat]).status_code == 200
+    assert seat not in free_seats(schedule)
+
+    _expire(schedule)
+    assert seat in free_seats(schedule)
+    assert _hold(other, schedule, [seat]).status_code == 200
+    assert _held_codes(schedule) == {seat}
+
+
+def test_add_data_consumes_the_holders_holds(login, book, schedule, free_seats):
+    holder = login('user')
+    seats = free_seats(schedule)[:2]
+    assert _hold(holder, schedule, seats).status_code == 200
+    assert _held_codes(schedule) == set(seats)
+
+    assert book(holder, schedule, seats).status_code == 200
+    assert _held_codes(schedule) == set()
+    assert all(_is_sold(schedule, seat) for seat in seats)
+
+
+def test_rolled_back_booking_keeps_its_holds(login, book, schedule, free_seats):
+    holder, other = login('user'), login('user000004')
+    held, taken = free_seats(schedule)[:2]
+    assert _hold(holder, schedule, [held]).status_code == 200
+    assert book(other, schedule, [taken]).status_code == 200
+
+    # Một ghế đã bán: cả giao dịch bị hoàn tác, kể cả việc xóa các ghế đang giữ
+    assert book(holder, schedule, [held, taken]).status_code == 302
+    assert _held_codes(schedule) == {held}
+    assert not _is_sold(schedule, held)
+    assert _hold(other, schedule, [held]).status_code == 409
+
+
+def test_sweep_removes_only_expired_holds(ctx, schedule):
+    seats = {s.seat_code: s.id for s in dao.get_available_seats(schedule.flight_schedule_id,
+                                                                 TicketClass.Economy_Class)}
+    expired, live = list(seats)[:2]
+    holds.place(schedule.flight_schedule_id, [seats[expired]], 'expired-key')
+    db.session.commit()
+    _expire(schedule)
+    holds.place(schedule.flight_schedule_id, [seats[live]], 'live-key')
+    db.session.commit()
+
+    assert holds.sweep() >= 1
+    rows = db.session.query(SeatHold.seat_id, SeatHold.hold_key).filter(
+        SeatHold.flight_schedule_id == schedule.flight_schedule_id).all()
+    assert rows == [(seats[live], 'live-key')]
+    assert db.session.query(SeatHold).filter(SeatHold.expires_at <= datetime.now()).count() == 0
+
+
+def test_hold_deadlock_is_retried_as_a_collision(ctx, monkeypatch, schedule):
+    # MySQL báo deadlock (1213) khi hai phiên cùng giữ một ghế chưa có dòng giữ
+    place = holds.place
+    calls = []
+
+    def deadlock_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OperationalError('INSERT INTO seat_hold', {}, Exception(1213, 'Deadlock found'))
+        return place(*args)
+
+    monkeypatch.setattr(holds, 'place', deadlock_once)
+    available, held, expires_at = dao.hold_first_available(schedule.flight_schedule_id, TicketClass.Economy_Class,
+                                                           2, 'deadlock-key')
+    assert len(calls) == 2 and len(held) == 2 and expires_at is not None
+
+    def connection_lost(*args):
+        raise OperationalError('INSERT INTO seat_hold', {}, Exception(2006, 'MySQL server has gone away'))
+
+    # Lỗi khác không phải tranh chấp ghế: vẫn báo lỗi
+    monkeypatch.setattr(holds, 'place', connection_lost)
+    with pytest.raises(OperationalError):
+        dao.hold_seats(schedule.flight_schedule_id, TicketClass.Economy_Class, held, 'deadlock-key')
@@ -0,0 +1,38 @@
+"""Add remaining seat counters to FlightSchedule
+
+Revision ID: 7b1d4e9a2c10
+Revises: 25c3051d8c36
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b1d4e9a2c10'
+down_revision = '25c3051d8c36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('flight_schedule', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('remaining_business_seats', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('remaining_economy_seats', sa.Integer(), nullable=False, server_default='0'))
+
+    # Khởi tạo bộ đếm từ SeatAssignment (chế độ "dense"), sau đó có thể chạy `flask seats-reconcile --repair`
+    for column, seat_class in (('remaining_business_seats', 'Business_Class'),
+                               ('remaining_economy_seats', 'Economy_Class')):
+        op.execute(
+            f"UPDATE flight_schedule SET {column} = ("
+            f"SELECT COUNT(*) FROM seat_assignment JOIN seat ON seat.id = seat_assignment.seat_id "
+            f"WHERE seat_assignment.flight_schedule_id = flight_schedule.id "
+            f"AND seat_assignment.is_available = 1 AND seat.seat_class = '{seat_class}')"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('flight_schedule', schema=None) as batch_op:
+        batch_op.drop_column('remaining_economy_seats')
+        batch_op.drop_column('remaining_business_seats')
@@ -0,0 +1,41 @@
+"""Add revenue_daily rollup table
+
+Revision ID: a9d3e6b1f274
+Revises: e5f07b3c9d82
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e6b1f274'
+down_revision = 'e5f07b3c9d82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revenue_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('flight_route_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.BigInteger(), nullable=False),
+    sa.Column('tickets', sa.Integer(), nullable=False),
+    sa.Column('receipts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['flight_route_id'], ['flight_route.id'], ),
+    sa.PrimaryKeyConstraint('day', 'flight_route_id')
+    )
+
+    # Nạp dữ liệu từ các hóa đơn đã có (tương đương `flask revenue-rebuild`)
+    op.execute(
+        "INSERT INTO revenue_daily (day, flight_route_id, revenue, tickets, receipts) "
+        "SELECT DATE(receipt.created_date), receipt_detail.flight_route_id, "
+        "SUM(receipt_detail.quantity * receipt_detail.unit_price), SUM(receipt_detail.quantity), COUNT(receipt.id) "
+        "FROM receipt JOIN receipt_detail ON receipt_detail.receipt_id = receipt.id "
+        "GROUP BY DATE(receipt.created_date), receipt_detail.flight_route_id"
+    )
+
+
+def downgrade():
+    op.drop_table('revenue_daily')
@@ -0,0 +1,52 @@
+"""Add flight_search read model
+
+Revision ID: c3a8f2d61e47
+Revises: 7b1d4e9a2c10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8f2d61e47'
+down_revision = '7b1d4e9a2c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sau khi nâng cấp cần chạy `flask search-rebuild` để nạp dữ liệu
+    op.create_table('flight_search',
+    sa.Column('flight_schedule_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('flight_id', sa.Integer(), nullable=False),
+    sa.Column('flight_code', sa.String(length=20), nullable=False),
+    sa.Column('dep_province', sa.String(length=100), nullable=False),
+    sa.Column('des_province', sa.String(length=100), nullable=False),
+    sa.Column('departure_airport', sa.String(length=100), nullable=False),
+    sa.Column('destination_airport', sa.String(length=100), nullable=False),
+    sa.Column('dep_time', sa.DateTime(), nullable=False),
+    sa.Column('arrival_time', sa.DateTime(), nullable=False),
+    sa.Column('flight_time', sa.Integer(), nullable=False),
+    sa.Column('business_price', sa.Integer(), nullable=False),
+    sa.Column('economy_price', sa.Integer(), nullable=False),
+    sa.Column('airplane_name', sa.String(length=100), nullable=False),
+    sa.Column('airline_name', sa.Enum('Bamboo_AirWays', 'Vietjet_Air', 'VietNam_Airline', name='airline'), nullable=False),
+    sa.Column('remaining_business_seats', sa.Integer(), nullable=False),
+    sa.Column('remaining_economy_seats', sa.Integer(), nullable=False),
+    sa.Column('intermediate_airport_1', sa.String(length=100), nullable=True),
+    sa.Column('ia_stop_time_1', sa.Integer(), nullable=True),
+    sa.Column('intermediate_airport_2', sa.String(length=100), nullable=True),
+    sa.Column('ia_stop_time_2', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('flight_schedule_id')
+    )
+    with op.batch_alter_table('flight_search', schema=None) as batch_op:
+        batch_op.create_index('ix_flight_search_route_dep_time', ['dep_province', 'des_province', 'dep_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('flight_search', schema=None) as batch_op:
+        batch_op.drop_index('ix_flight_search_route_dep_time')
+
+    op.drop_table('flight_search')
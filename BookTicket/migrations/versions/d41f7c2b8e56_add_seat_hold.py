@@ -0,0 +1,39 @@
+"""Add seat_hold table
+
+Revision ID: d41f7c2b8e56
+Revises: a9d3e6b1f274
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7c2b8e56'
+down_revision = 'a9d3e6b1f274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('seat_hold',
+    sa.Column('flight_schedule_id', sa.Integer(), nullable=False),
+    sa.Column('seat_id', sa.Integer(), nullable=False),
+    sa.Column('hold_key', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['flight_schedule_id'], ['flight_schedule.id'], ),
+    sa.ForeignKeyConstraint(['seat_id'], ['seat.id'], ),
+    sa.PrimaryKeyConstraint('flight_schedule_id', 'seat_id')
+    )
+    with op.batch_alter_table('seat_hold', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_seat_hold_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index('ix_seat_hold_schedule_key', ['flight_schedule_id', 'hold_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('seat_hold', schema=None) as batch_op:
+        batch_op.drop_index('ix_seat_hold_schedule_key')
+        batch_op.drop_index(batch_op.f('ix_seat_hold_expires_at'))
+
+    op.drop_table('seat_hold')
@@ -0,0 +1,57 @@
+"""Add indexes for the search and booking hot paths
+
+Revision ID: e5f07b3c9d82
+Revises: c3a8f2d61e47
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f07b3c9d82'
+down_revision = 'c3a8f2d61e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('province', schema=None) as batch_op:
+        batch_op.create_index('ix_province_name', ['name'], unique=False)
+
+    with op.batch_alter_table('flight_schedule', schema=None) as batch_op:
+        batch_op.create_index('ix_flight_schedule_flight_dep_time', ['flight_id', 'dep_time'], unique=False)
+
+    with op.batch_alter_table('seat', schema=None) as batch_op:
+        batch_op.create_index('ix_seat_airplane_class', ['airplane_id', 'seat_class'], unique=False)
+
+    with op.batch_alter_table('seat_assignment', schema=None) as batch_op:
+        batch_op.create_index('ix_seat_assignment_schedule_available', ['flight_schedule_id', 'is_available'],
+                              unique=False)
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('receipt', schema=None) as batch_op:
+        batch_op.create_index('ix_receipt_created_date', ['created_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('receipt', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipt_created_date')
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_user_id')
+
+    with op.batch_alter_table('seat_assignment', schema=None) as batch_op:
+        batch_op.drop_index('ix_seat_assignment_schedule_available')
+
+    with op.batch_alter_table('seat', schema=None) as batch_op:
+        batch_op.drop_index('ix_seat_airplane_class')
+
+    with op.batch_alter_table('flight_schedule', schema=None) as batch_op:
+        batch_op.drop_index('ix_flight_schedule_flight_dep_time')
+
+    with op.batch_alter_table('province', schema=None) as batch_op:
+        batch_op.drop_index('ix_province_name')
@@ -0,0 +1,26 @@
+"""Add flight_search dep_time index
+
+Revision ID: e7a2c9d4f013
+Revises: d41f7c2b8e56
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c9d4f013'
+down_revision = 'd41f7c2b8e56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('flight_search', schema=None) as batch_op:
+        batch_op.create_index('ix_flight_search_dep_time', ['dep_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('flight_search', schema=None) as batch_op:
+        batch_op.drop_index('ix_flight_search_dep_time')